@@ -5,9 +5,12 @@ import os
 import logging
 from typing import Dict, Any
 from storage.sqlite_storage import CodeQueryServer
+from helpers.log_sanitizer import SanitizingFilter
 from .parser import parse_claude_response
 
 logger = logging.getLogger(__name__)
+# Claude CLI stderr is logged verbatim on failure, so mask secrets first
+logger.addFilter(SanitizingFilter())
 
 
 class FileAnalyzer:
@@ -58,7 +61,7 @@ class FileAnalyzer:
             with open(real_filepath, 'r', encoding='utf-8') as f:
                 file_content = f.read()
         except Exception as e:
-            logger.error(f"Failed to read file {filepath}: {e}")
+            logger.error("Failed to read file %s: %s", filepath, e)
             raise
 
         # 3. Analyze with Claude (using stdin for security)
@@ -127,14 +130,14 @@ class FileAnalyzer:
             if result.returncode != 0:
                 error_summary = (result.stderr or "No stderr output").splitlines()[0] if result.stderr else "Unknown error"
                 error_msg = f"Claude processing failed with exit code {result.returncode}"
-                logger.error(f"{error_msg}. stderr: {result.stderr}")
+                logger.error("%s. stderr: %s", error_msg, result.stderr)
                 raise Exception(f"{error_msg}. First error: {error_summary}")
             
             return result.stdout
             
         except subprocess.TimeoutExpired:
-            logger.error(f"Claude analysis timed out for {filepath}")
+            logger.error("Claude analysis timed out for %s", filepath)
             raise Exception(f"Claude analysis timed out after 60 seconds")
         except Exception as e:
-            logger.error(f"Failed to analyze {filepath} with Claude: {e}")
+            logger.error("Failed to analyze %s with Claude: %s", filepath, e)
             raise
\ No newline at end of file
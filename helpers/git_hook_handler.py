@@ -2,10 +2,18 @@
 import os
 import sys
 import json
+import re
 import time
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+# Extracts a JSON object (one level of nesting) from Claude output that has extra text
+_JSON_OBJECT_RE = re.compile(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL)
+
+# On Linux a live process has a /proc entry, which also covers workers owned by
+# another user (where os.kill(pid, 0) fails with EPERM)
+_HAS_PROCFS = sys.platform.startswith('linux') and os.path.isdir('/proc/self')
+
 class GitHookHandler:
     """Handles git hook logic for code-query documentation updates."""
     
@@ -20,6 +28,8 @@ class GitHookHandler:
         self.config_path = os.path.join(self.code_query_dir, 'config.json')
         self.queue_file = os.path.join(self.code_query_dir, 'file_queue.json')
         self.pid_file = os.path.join(self.code_query_dir, 'worker.pid')
+        # (pid file identity, pid) so repeated checks skip re-reading the file
+        self._pid_cache: Optional[Tuple[Tuple[int, int, int], int]] = None
     
     def handle_post_commit(self) -> int:
         """
@@ -93,24 +103,24 @@ class GitHookHandler:
         Atomically reads and clears the queue to prevent race conditions.
         It does this by renaming the queue file, which is an atomic operation.
         """
-        if not os.path.exists(self.queue_file):
-            return []
-
         # Create a unique temporary path for the snapshot
         snapshot_path = self.queue_file + f".snapshot.{os.getpid()}.{time.time()}"
         
         try:
-            # Atomically move the queue file to our snapshot path
+            # Atomically move the queue file to our snapshot path; a missing
+            # queue surfaces here, so no separate exists() check is needed
             os.rename(self.queue_file, snapshot_path)
         except FileNotFoundError:
-            # Another process beat us to it, the queue is empty.
+            # No queue, or another process beat us to it, the queue is empty.
             return []
 
         try:
-            with open(snapshot_path, 'r') as f:
-                data = json.load(f)
-                return data.get('files', [])
-        except (json.JSONDecodeError, IOError):
+            # Decode straight from bytes rather than through a text wrapper
+            with open(snapshot_path, 'rb') as f:
+                data = json.loads(f.read())
+            return data.get('files', [])
+        except (ValueError, IOError):
+            # ValueError covers both JSONDecodeError and undecodable bytes.
             # If the snapshot is corrupted, return an empty list.
             # The corrupted file will remain for inspection but won't be re-processed.
             return []
@@ -123,25 +133,58 @@ class GitHookHandler:
     
     def _is_worker_running(self) -> bool:
         """Check if the background worker is running."""
-        if not os.path.exists(self.pid_file):
+        try:
+            st = os.stat(self.pid_file)
+        except OSError:
             return False
         
-        try:
-            with open(self.pid_file, 'r') as f:
-                pid = int(f.read().strip())
-            
-            # Use basic os.kill with signal 0 to check if process exists
-            # This works cross-platform without requiring psutil in hooks
+        # The pid is only re-parsed when the pid file is replaced or rewritten;
+        # liveness is always re-checked since the worker can exit at any time
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if self._pid_cache is not None and self._pid_cache[0] == identity:
+            pid = self._pid_cache[1]
+        else:
             try:
-                os.kill(pid, 0)
-                return True
-            except OSError:
-                # Process doesn't exist
+                with open(self.pid_file, 'r') as f:
+                    pid = int(f.read().strip())
+            except (ValueError, IOError):
                 return False
-                
-        except (ValueError, IOError):
+            self._pid_cache = (identity, pid)
+        
+        if pid <= 0:
+            return False
+        if _HAS_PROCFS:
+            return os.path.exists(f'/proc/{pid}')
+        
+        # Use basic os.kill with signal 0 to check if process exists
+        # This works cross-platform without requiring psutil in hooks
+        try:
+            os.kill(pid, 0)
+            return True
+        except OSError:
+            # Process doesn't exist
             return False
     
+    def _resolve_project_path(self, filepath: str) -> Optional[str]:
+        """
+        Resolve a queued path, refusing anything outside the project root.
+        
+        Args:
+            filepath: Path relative to the project root
+            
+        Returns:
+            The resolved real path, or None if the path escapes the project
+            or cannot be resolved (e.g. it contains a null byte)
+        """
+        try:
+            real_filepath = os.path.realpath(os.path.join(self.project_root, filepath))
+            # project_root is already a realpath, see __init__
+            if os.path.commonpath([real_filepath, self.project_root]) != self.project_root:
+                return None
+        except ValueError:
+            return None
+        return real_filepath
+    
     def _process_synchronously(self, files: List[Dict[str, str]], config: Dict) -> int:
         """
         Process files synchronously during the commit.
@@ -164,16 +207,28 @@ class GitHookHandler:
         completed = []
         failed = []
         
+        # One storage connection for the whole commit, opened on first use
+        storage = None
+        
+        def save_documentation(filepath: str, commit_hash: str, doc_data: Dict) -> None:
+            nonlocal storage
+            if storage is None:
+                from storage.sqlite_storage import CodeQueryServer
+                storage = CodeQueryServer(os.path.join(self.code_query_dir, 'code_data.db'))
+            storage.update_file_documentation(
+                dataset_name=dataset_name,
+                filepath=filepath,
+                commit_hash=commit_hash,
+                **doc_data
+            )
+        
         for file_info in files:
             filepath = file_info['filepath']
             commit_hash = file_info.get('commit_hash', 'HEAD')
             
             # Security check: Ensure file is within project root
-            abs_filepath = os.path.join(self.project_root, filepath)
-            real_filepath = os.path.realpath(abs_filepath)
-            real_project_root = os.path.realpath(self.project_root)
-            
-            if os.path.commonpath([real_filepath, real_project_root]) != real_project_root:
+            real_filepath = self._resolve_project_path(filepath)
+            if real_filepath is None:
                 print(f"  ⚠️  Skipping {filepath} (outside project)")
                 continue
             
@@ -215,32 +270,17 @@ Content:
                         doc_data = json.loads(result.stdout.strip())
                         
                         # Update database
-                        from storage.sqlite_storage import CodeQueryServer
-                        storage = CodeQueryServer(os.path.join(self.project_root, '.code-query', 'code_data.db'))
-                        storage.update_file_documentation(
-                            dataset_name=dataset_name,
-                            filepath=filepath,
-                            commit_hash=commit_hash,
-                            **doc_data
-                        )
+                        save_documentation(filepath, commit_hash, doc_data)
                         completed.append(file_info)
                     except json.JSONDecodeError:
                         # If direct parsing fails, try to extract JSON
-                        import re
-                        json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', result.stdout, re.DOTALL)
+                        json_match = _JSON_OBJECT_RE.search(result.stdout)
                         if json_match:
                             try:
                                 doc_data = json.loads(json_match.group())
                                 
                                 # Update database
-                                from storage.sqlite_storage import CodeQueryServer
-                                storage = CodeQueryServer(os.path.join(self.project_root, '.code-query', 'code_data.db'))
-                                storage.update_file_documentation(
-                                    dataset_name=dataset_name,
-                                    filepath=filepath,
-                                    commit_hash=commit_hash,
-                                    **doc_data
-                                )
+                                save_documentation(filepath, commit_hash, doc_data)
                                 completed.append(file_info)
                             except Exception as e:
                                 print(f" ✗ (parse error: {e})")
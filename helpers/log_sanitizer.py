@@ -0,0 +1,65 @@
+"""Redaction of secrets from log records.
+
+Worker and analyzer logs include raw Claude CLI stderr and exception text,
+which can echo API keys, tokens or database URLs. The SanitizingFilter masks
+those before a record reaches any handler.
+"""
+
+import logging
+import re
+
+# All secret patterns are fused into one alternation so each message is
+# scanned in a single pass. Each alternative wraps the part to mask in a
+# named group (the last capturing group of the alternative), so the match's
+# lastgroup identifies which kind of secret was found.
+_SECRET_RE = re.compile(
+    r'(?P<api_key>\bsk-[A-Za-z0-9_-]{8,})'
+    r'|(?P<github_token>\bgh[pousr]_[A-Za-z0-9]{20,})'
+    r'|(?P<aws_key>\bAKIA[0-9A-Z]{16}\b)'
+    r'|://(?P<url_credentials>[^\s/:@]+:[^\s/@]+)@'
+    r'|(?i:\b(?:password|passwd|pwd|secret|token)\s*[=:]\s*)(?P<password>[^\s,;&\'"]+)'
+)
+
+
+def _replace_match(replacement: str):
+    """Masker for secrets whose named group spans the whole match."""
+    return lambda match: replacement
+
+
+def _replace_group(label: str, replacement: str):
+    """Masker that replaces only the named group, keeping surrounding context."""
+    def mask(match: re.Match) -> str:
+        text = match.group()
+        offset = match.start()
+        start, end = match.span(label)
+        return text[:start - offset] + replacement + text[end - offset:]
+    return mask
+
+
+# Resolved once per label so the per-match path is a single call
+_MASKERS = {
+    'api_key': _replace_match('[REDACTED_API_KEY]'),
+    'github_token': _replace_match('[REDACTED_GITHUB_TOKEN]'),
+    'aws_key': _replace_match('[REDACTED_AWS_KEY]'),
+    'url_credentials': _replace_group('url_credentials', '[REDACTED]'),
+    'password': _replace_group('password', '[REDACTED]'),
+}
+
+
+def _mask(match: re.Match) -> str:
+    """Replace the secret part of a match."""
+    return _MASKERS[match.lastgroup](match)
+
+
+class SanitizingFilter(logging.Filter):
+    """Logging filter that masks secrets in the formatted message."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # subn reports the match count from the same pass, so clean messages
+        # need no second comparison over the whole string
+        sanitized, count = _SECRET_RE.subn(_mask, record.getMessage())
+        if count:
+            # Store the already formatted message so handlers don't re-apply args
+            record.msg = sanitized
+            record.args = None
+        return True
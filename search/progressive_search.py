@@ -1,7 +1,8 @@
 """Progressive search strategy implementation for optimal results."""
 
-from typing import List, Callable, TypeVar, Optional
+from typing import List, Callable, Iterable, TypeVar, Optional
 from dataclasses import dataclass
+from itertools import islice
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,7 +10,7 @@ logger = logging.getLogger(__name__)
 T = TypeVar('T')
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchStrategy:
     """Represents a search strategy with a name and execution function."""
     name: str
@@ -37,7 +38,7 @@ class ProgressiveSearchStrategy:
     def execute_search(
         self,
         query: str,
-        search_func: Callable[[str], List[T]],
+        search_func: Callable[[str], Iterable[T]],
         min_results: int = 1,
         max_results: int = 50,
         deduplicate_func: Optional[Callable[[T], str]] = None
@@ -46,7 +47,8 @@ class ProgressiveSearchStrategy:
         
         Args:
             query: Original user query
-            search_func: Function that executes search with transformed query
+            search_func: Function that executes search with transformed query;
+                may return a generator, which is only consumed up to max_results
             min_results: Minimum results needed before trying next strategy
             max_results: Maximum total results to return
             deduplicate_func: Optional function to get deduplication key from result
@@ -75,27 +77,30 @@ class ProgressiveSearchStrategy:
                 # Execute search
                 results = search_func(transformed_query)
                 
-                # Deduplicate if function provided
+                # Deduplicate if function provided, straight into the combined
+                # results so rows past max_results are never keyed
                 if deduplicate_func:
-                    new_results = []
+                    found = 0
                     for result in results:
+                        if len(all_results) >= max_results:
+                            break
                         key = deduplicate_func(result)
                         if key not in seen_keys:
                             seen_keys.add(key)
-                            new_results.append(result)
-                    results = new_results
-                
-                # Add to combined results
-                all_results.extend(results)
+                            all_results.append(result)
+                            found += 1
+                else:
+                    before = len(all_results)
+                    all_results.extend(islice(results, max_results - before))
+                    found = len(all_results) - before
                 
                 # Log strategy success
                 logger.info(
-                    f"Strategy '{strategy.name}' found {len(results)} results"
+                    f"Strategy '{strategy.name}' found {found} results"
                 )
                 
                 # Check if we have enough total results
                 if len(all_results) >= max_results:
-                    all_results = all_results[:max_results]
                     break
                     
             except Exception as e:
@@ -134,6 +139,39 @@ class ProgressiveSearchStrategy:
         return False
 
 
+# Characters that force a term to be quoted so FTS5 treats it literally
+_QUOTE_CHARS = frozenset(".-_$@:#")
+
+
+def _exact(query: str) -> str:
+    """Use the query as-is."""
+    return query
+
+
+def _fuzzy_terms(query: str) -> str:
+    """OR together individual terms, quoting those with special characters."""
+    return " OR ".join(
+        f'"{term}"' if not _QUOTE_CHARS.isdisjoint(term) else term
+        for term in query.split()
+    )
+
+
+def _prefix_match(query: str) -> str:
+    """OR together prefix matches of the longer terms."""
+    return " OR ".join(
+        f"{term}*" for term in query.split()
+        if len(term) >= 3  # Only prefix match longer terms
+    )
+
+
+def _partial_terms(query: str) -> str:
+    """OR together quoted terms, skipping very short ones."""
+    return " OR ".join(
+        f'"{term}"' for term in query.split()
+        if len(term) >= 2  # Skip very short terms
+    )
+
+
 def create_default_progressive_strategy() -> ProgressiveSearchStrategy:
     """Create the default progressive search strategy.
     
@@ -144,36 +182,27 @@ def create_default_progressive_strategy() -> ProgressiveSearchStrategy:
         SearchStrategy(
             name="exact",
             description="Exact phrase and code-aware search",
-            execute=lambda q: q,  # Use query as-is
+            execute=_exact,
             min_results_threshold=5
         ),
         SearchStrategy(
             name="fuzzy_terms",
             description="Individual terms with OR",
-            execute=lambda q: " OR ".join(
-                f'"{term}"' if any(c in term for c in ".-_$@:#") else term
-                for term in q.split()
-            ),
+            execute=_fuzzy_terms,
             min_results_threshold=3
         ),
         SearchStrategy(
             name="prefix_match",
             description="Prefix matching on terms",
-            execute=lambda q: " OR ".join(
-                f"{term}*" for term in q.split()
-                if len(term) >= 3  # Only prefix match longer terms
-            ),
+            execute=_prefix_match,
             min_results_threshold=1
         ),
         SearchStrategy(
             name="partial_terms",
             description="Match any single term",
-            execute=lambda q: " OR ".join(
-                f'"{term}"' for term in q.split()
-                if len(term) >= 2  # Skip very short terms
-            ),
+            execute=_partial_terms,
             min_results_threshold=0
         )
     ]
     
-    return ProgressiveSearchStrategy(strategies)
\ No newline at end of file
+    return ProgressiveSearchStrategy(strategies)
@@ -49,6 +49,19 @@ class QueryComplexityAnalyzer:
     PHRASE_COST = 3.0
     NESTED_GROUP_COST = 4.0
     
+    # Boolean operators as standalone words
+    OPERATOR_PATTERN = re.compile(r'\b(?:AND|OR|NOT)\b', re.IGNORECASE)
+    
+    # Grouping and phrase delimiters stripped before counting terms
+    DELIMITER_PATTERN = re.compile(r'[()"]')
+    
+    # Quoted strings, accounting for escaped quotes
+    # This is the same robust pattern used in the sanitizer
+    QUOTED_PHRASE_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"')
+    
+    # Programming-related special characters
+    SPECIAL_CHAR_PATTERN = re.compile(r'[$@#:._-]')
+    
     def __init__(
         self,
         max_terms: int = DEFAULT_MAX_TERMS,
@@ -118,8 +131,7 @@ class QueryComplexityAnalyzer:
         term_count = self._count_terms(query)
         operator_count = self._count_operators(query)
         nesting_depth = self._calculate_nesting_depth(query)
-        wildcard_count = self._count_wildcards(query)
-        phrase_count = self._count_phrases(query)
+        phrase_count, wildcard_count = self._count_phrases_and_wildcards(query)
         special_char_count = self._count_special_chars(query)
         
         # Calculate estimated cost
@@ -189,11 +201,24 @@ class QueryComplexityAnalyzer:
         )
         return metrics.complexity_level == ComplexityLevel.TOO_COMPLEX
         
+    @staticmethod
+    def _may_contain_operator(query: str) -> bool:
+        """Cheap substring prefilter before running OPERATOR_PATTERN.
+        
+        A False result means the regex cannot match; True still needs the
+        regex to enforce word boundaries (e.g. "HANDLE" contains "AND").
+        """
+        upper = query.upper()
+        return 'AND' in upper or 'OR' in upper or 'NOT' in upper
+        
     def _count_terms(self, query: str) -> int:
         """Count search terms in query."""
         # Remove operators and special syntax
-        cleaned = re.sub(r'\b(AND|OR|NOT)\b', ' ', query, flags=re.IGNORECASE)
-        cleaned = re.sub(r'[()"]', ' ', cleaned)
+        cleaned = query
+        if self._may_contain_operator(query):
+            cleaned = self.OPERATOR_PATTERN.sub(' ', cleaned)
+        if '(' in cleaned or ')' in cleaned or '"' in cleaned:
+            cleaned = self.DELIMITER_PATTERN.sub(' ', cleaned)
         
         # Split and count non-empty terms
         terms = [t for t in cleaned.split() if t and not t.isspace()]
@@ -201,7 +226,9 @@ class QueryComplexityAnalyzer:
         
     def _count_operators(self, query: str) -> int:
         """Count boolean operators."""
-        operators = re.findall(r'\b(AND|OR|NOT)\b', query, flags=re.IGNORECASE)
+        if not self._may_contain_operator(query):
+            return 0
+        operators = self.OPERATOR_PATTERN.findall(query)
         return len(operators)
         
     def _calculate_nesting_depth(self, query: str) -> int:
@@ -218,28 +245,27 @@ class QueryComplexityAnalyzer:
                 
         return max_depth
         
-    def _count_wildcards(self, query: str) -> int:
-        """Count wildcard operators."""
-        # Pattern to match quoted strings, accounting for escaped quotes
-        # This is the same robust pattern used in the sanitizer
-        quoted_phrase_pattern = re.compile(r'"([^"\\]|\\.)*"')
+    def _count_phrases_and_wildcards(self, query: str) -> Tuple[int, int]:
+        """Count quoted phrases and the wildcard operators outside them.
         
-        # Remove all quoted phrases from the query string
-        query_without_phrases = quoted_phrase_pattern.sub('', query)
+        Both counts come from one pass over the quoted phrases: an asterisk
+        inside a phrase is literal text, so wildcards are all asterisks minus
+        those found in phrases.
+        """
+        if '"' not in query:
+            return 0, query.count('*')
         
-        # Count the remaining asterisks
-        return query_without_phrases.count('*')
+        phrase_count = 0
+        quoted_asterisks = 0
+        for match in self.QUOTED_PHRASE_PATTERN.finditer(query):
+            phrase_count += 1
+            quoted_asterisks += match.group().count('*')
         
-    def _count_phrases(self, query: str) -> int:
-        """Count quoted phrases."""
-        # Match quoted strings, accounting for escaped quotes
-        phrases = re.findall(r'"([^"\\]|\\.)*"', query)
-        return len(phrases)
+        return phrase_count, query.count('*') - quoted_asterisks
         
     def _count_special_chars(self, query: str) -> int:
         """Count code-specific special characters."""
-        # Count programming-related special chars
-        special_chars = re.findall(r'[$@#:._-]', query)
+        special_chars = self.SPECIAL_CHAR_PATTERN.findall(query)
         return len(special_chars)
         
     def _calculate_cost(
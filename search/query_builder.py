@@ -3,6 +3,9 @@
 from typing import Optional, List
 from .query_strategies import QueryStrategy, CodeAwareQueryStrategy, FallbackStrategy
 
+# FTS5 query returned for empty input; matches nothing
+_EMPTY_QUERY = '""'
+
 class FTS5QueryBuilder:
     """Builds optimized FTS5 queries with operator preservation and fallback support."""
     
@@ -29,7 +32,7 @@ class FTS5QueryBuilder:
             FTS5-formatted query string
         """
         if not user_query or not user_query.strip():
-            return '""'  # Empty query
+            return _EMPTY_QUERY
             
         return self.primary_strategy.build(user_query)
     
@@ -44,7 +47,7 @@ class FTS5QueryBuilder:
             FTS5-formatted fallback query
         """
         if not user_query or not user_query.strip():
-            return '""'
+            return _EMPTY_QUERY
             
         return self.fallback_strategy.build(user_query)
     
@@ -62,12 +65,12 @@ class FTS5QueryBuilder:
         
         # Primary query
         primary = self.build_query(user_query)
-        if primary and primary != '""':
+        if primary and primary != _EMPTY_QUERY:
             variants.append(primary)
         
         # Fallback query
         fallback = self.build_fallback_query(user_query)
-        if fallback and fallback != '""' and fallback != primary:
+        if fallback and fallback != _EMPTY_QUERY and fallback != primary:
             variants.append(fallback)
         
         # Additional variants from fallback strategy
@@ -1,13 +1,17 @@
 """FTS5 query sanitizer that preserves legitimate syntax while preventing injection attacks."""
 
 import re
+from functools import lru_cache
 from typing import List, Tuple, Set, Optional
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True)
 class SanitizationConfig:
-    """Configuration for query sanitization behavior."""
+    """Configuration for query sanitization behavior.
+    
+    Frozen so it can key the sanitizer's result cache.
+    """
     allow_wildcards: bool = True
     allow_column_filters: bool = False  # Disabled by default for security
     allow_initial_token_match: bool = True
@@ -26,18 +30,17 @@ class FTS5QuerySanitizer:
     - Maintains search functionality for code patterns
     """
     
+    # Query returned when nothing searchable remains
+    EMPTY_QUERY = '""'
+    
     # FTS5 operators that should be preserved when standalone
-    FTS5_OPERATORS = {'AND', 'OR', 'NOT'}
+    FTS5_OPERATORS = frozenset({'AND', 'OR', 'NOT'})
     
-    # Pattern to match NEAR operator with proper syntax
-    # Captures: NEAR(terms) or NEAR(terms, distance)
-    NEAR_PATTERN = re.compile(
-        r'NEAR\s*\(\s*([^,)]+?)(?:\s*,\s*(\d+))?\s*\)',
-        re.IGNORECASE
-    )
+    # Characters that force a regular term to be quoted
+    QUOTE_CHARS = frozenset('$_->:.@+#;*()[]{}"')
     
-    # Pattern to match quoted phrases (handling escaped quotes)
-    QUOTED_PHRASE_PATTERN = re.compile(r'"((?:[^"]|"")*)"')
+    # Terms FTS5 accepts unquoted; anything else is quoted as well
+    BAREWORD_PATTERN = re.compile(r'\w+')
     
     # Pattern to detect column filters (security risk)
     # Matches: word: or -word: or {word word}: but NOT :: (namespace)
@@ -46,14 +49,59 @@ class FTS5QuerySanitizer:
         re.IGNORECASE
     )
     
-    # Pattern to detect initial token match
-    # Captures the ^ and the term, but not the preceding space
-    INITIAL_TOKEN_PATTERN = re.compile(r'\^(\S+)')
+    # Single left-to-right tokenizer for the whole query. At each position the
+    # alternatives are tried in order and the outer named group that matched
+    # (match.lastgroup) gives the token type:
+    #   phrase  - quoted phrase, handling "" escapes
+    #   near    - NEAR(terms) or NEAR(terms, distance), case-insensitive
+    #   column  - column filter chunk: word:term, -word:term or {word}:term
+    #   initial - initial token match on a term or phrase: ^term, ^"a b", ^ term
+    #   code    - code pattern with -> or :: that might include ()
+    #   paren   - standalone parenthesis
+    #   term    - any other run up to whitespace, a parenthesis, a phrase or
+    #             a NEAR clause.
+    #             A quote with no closing quote after it cannot open a phrase,
+    #             so it stays inside its term, which is then quoted and escaped
+    QUERY_TOKEN_PATTERN = re.compile(
+        r'(?P<phrase>"(?P<phrase_text>(?:[^"]|"")*)")'
+        r'|(?P<near>(?i:NEAR)\s*\(\s*(?P<near_terms>[^,)]+?)'
+        r'(?:\s*,\s*(?P<near_distance>\d+))?\s*\))'
+        r'|(?<!\S)(?P<column>(?:\w+:(?!:)|-\w+:|\{[^}\s]+\}:)[^\s"]*(?:"(?=[^"]*\Z)[^\s"]*)?)'
+        r'|(?P<initial>\^\s*(?P<initial_term>"(?:[^"]|"")*"'
+        r'|[^\s()"]*"(?=[^"]*\Z)[^\s()]*|[^\s()"]+))'
+        r'|(?P<code>[$@_]?\w+(?:->|::)\w+\(\))'
+        r'|(?P<paren>[()])'
+        r'|(?P<term>(?:(?!(?i:NEAR)\s*\()[^\s()"])*"(?=[^"]*\Z)[^\s()]*'
+        r'|[^\s()"](?:(?!(?i:NEAR)\s*\()[^\s()"])*)'
+    )
+    
+    # A complete quoted phrase, with "" escapes
+    PHRASE_PATTERN = re.compile(r'"(?:[^"]|"")*"')
+    
+    # Terms inside NEAR(...): whole quoted phrases, else whitespace-separated runs
+    NEAR_TERM_PATTERN = re.compile(r'(?<!\S)"(?:[^"]|"")*"(?!\S)|\S+')
+    
+    # Distinct (query, config) results kept per sanitizer instance
+    CACHE_SIZE = 4096
     
     def __init__(self, config: Optional[SanitizationConfig] = None):
         """Initialize sanitizer with configuration."""
+        # Sanitizing is a pure function of the query and both configs, so
+        # repeated queries are answered from a per-instance LRU cache
+        self._cached_sanitize = lru_cache(maxsize=self.CACHE_SIZE)(self._sanitize)
         self.config = config or SanitizationConfig()
     
+    @property
+    def config(self) -> SanitizationConfig:
+        """Instance-wide sanitization configuration."""
+        return self._config
+    
+    @config.setter
+    def config(self, config: SanitizationConfig) -> None:
+        # Cached results were computed against the previous instance config
+        self._config = config
+        self._cached_sanitize.cache_clear()
+    
     def sanitize(self, query: str, config: Optional[SanitizationConfig] = None) -> str:
         """
         Sanitize FTS5 query while preserving legitimate functionality.
@@ -69,11 +117,13 @@ class FTS5QuerySanitizer:
             ValueError: If query contains forbidden syntax or is too complex
         """
         if not query or not query.strip():
-            return '""'
+            return self.EMPTY_QUERY
         
         # Use provided config or fall back to instance config
-        config = config or self.config
-        
+        return self._cached_sanitize(query, config or self.config)
+    
+    def _sanitize(self, query: str, config: SanitizationConfig) -> str:
+        """Uncached body of sanitize() for a non-empty query."""
         # Check for column filters if not allowed
         if not config.allow_column_filters:
             if self.COLUMN_FILTER_PATTERN.search(query):
@@ -90,7 +140,11 @@ class FTS5QuerySanitizer:
         return self._reconstruct_query(components, config)
     
     def _extract_query_components(self, query: str, config: SanitizationConfig) -> dict:
-        """Extract query components for processing."""
+        """Extract query components for processing in one pass over the query.
+        
+        ordered_components holds (text, is_term) pairs in query order; only
+        regular terms (is_term) may still need quoting on reconstruction.
+        """
         components = {
             'phrases': [],
             'near_clauses': [],
@@ -99,182 +153,134 @@ class FTS5QuerySanitizer:
             'regular_terms': [],
             'initial_matches': [],
             'column_filters': [],
-            'ordered_components': []  # Track order for reconstruction
+            'ordered_components': []
         }
+        ordered = components['ordered_components']
+        allow_columns = self.config.allow_column_filters
+        allow_initial = self.config.allow_initial_token_match
+        depth = 0
         
-        remaining = query
-        
-        # Extract quoted phrases first
-        phrase_placeholders = {}
-        offset = 0
-        
-        for i, match in enumerate(self.QUOTED_PHRASE_PATTERN.finditer(query)):
-            phrase_content = match.group(1)
-            # Validate phrase length
-            if len(phrase_content) > config.max_phrase_length:
-                phrase_content = phrase_content[:config.max_phrase_length]
-            
-            # Store sanitized phrase - don't double quotes that are already doubled
-            safe_phrase = phrase_content  # Already has proper quote escaping
-            components['phrases'].append(f'"{safe_phrase}"')
-            
-            # Create placeholder
-            placeholder = f"__PHRASE_{i}__"
-            
-            # Calculate adjusted positions
-            start = match.start() - offset
-            end = match.end() - offset
-            
-            # Replace in remaining string
-            remaining = remaining[:start] + placeholder + remaining[end:]
-            
-            # Update offset for next iteration
-            offset += (end - start) - len(placeholder)
-            
-            phrase_placeholders[placeholder] = (match.start(), match.end())
-        
-        # Extract NEAR clauses
-        near_placeholders = {}
-        near_offset = 0
-        
-        for i, match in enumerate(self.NEAR_PATTERN.finditer(remaining)):
-            terms = match.group(1)
-            distance = match.group(2) or "10"  # Default distance
-            
-            # Terms are now properly parsed by the regex
-            
-            # Sanitize terms inside NEAR
-            safe_terms = self._sanitize_near_terms(terms)
-            components['near_clauses'].append(f"NEAR({safe_terms}, {distance})")
-            
-            # Create placeholder
-            placeholder = f"__NEAR_{i}__"
-            
-            # Calculate adjusted positions
-            start = match.start() - near_offset
-            end = match.end() - near_offset
+        for match in self.QUERY_TOKEN_PATTERN.finditer(query):
+            kind = match.lastgroup
             
-            # Replace in remaining string
-            remaining = remaining[:start] + placeholder + remaining[end:]
-            
-            # Update offset
-            near_offset += (end - start) - len(placeholder)
+            if kind == 'phrase':
+                phrase_content = match.group('phrase_text')
+                # Validate phrase length
+                if len(phrase_content) > config.max_phrase_length:
+                    phrase_content = phrase_content[:config.max_phrase_length]
+                # Already has proper quote escaping, so don't double quotes again
+                phrase = f'"{phrase_content}"'
+                components['phrases'].append(phrase)
+                ordered.append((phrase, False))
+                continue
             
-            near_placeholders[placeholder] = (match.start(), match.end())
-        
-        # Extract column filters if allowed
-        column_placeholders = {}
-        if self.config.allow_column_filters:
-            # Handle column filters before other processing
-            parts = remaining.split()
-            new_parts = []
+            if kind == 'near':
+                distance = match.group('near_distance') or "10"  # Default distance
+                # Sanitize terms inside NEAR
+                safe_terms = self._sanitize_near_terms(match.group('near_terms'))
+                if not safe_terms:
+                    # NEAR() with no searchable terms is not valid FTS5
+                    continue
+                near = f"NEAR({safe_terms}, {distance})"
+                components['near_clauses'].append(near)
+                ordered.append((near, False))
+                continue
             
-            for part in parts:
-                if ':' in part and not part.startswith('__'):
-                    # This might be a column filter
-                    if self.COLUMN_FILTER_PATTERN.match(' ' + part):
-                        components['column_filters'].append(part)
-                        placeholder = f"__COLUMN_{len(components['column_filters'])-1}__"
-                        column_placeholders[placeholder] = part
-                        new_parts.append(placeholder)
-                    else:
-                        new_parts.append(part)
-                else:
-                    new_parts.append(part)
+            if kind == 'column' and allow_columns:
+                column = match.group()
+                components['column_filters'].append(column)
+                ordered.append((column, False))
+                continue
             
-            remaining = ' '.join(new_parts)
-        
-        # Extract initial token matches if allowed
-        initial_placeholders = {}
-        initial_offset = 0
-        
-        if self.config.allow_initial_token_match:
-            for i, match in enumerate(self.INITIAL_TOKEN_PATTERN.finditer(remaining)):
-                term = match.group(1)
+            if kind == 'initial' and allow_initial:
                 # Remove wildcards from initial matches (not supported by FTS5)
-                safe_term = term.rstrip('*')
-                components['initial_matches'].append(f"^{safe_term}")
-                
-                placeholder = f"__INITIAL_{i}__"
-                
-                # Calculate adjusted positions
-                start = match.start() - initial_offset
-                end = match.end() - initial_offset
-                
-                # Replace in remaining string
-                remaining = remaining[:start] + placeholder + remaining[end:]
-                
-                # Update offset
-                initial_offset += (end - start) - len(placeholder)
-                
-                initial_placeholders[placeholder] = match.start()
-        
-        # Process remaining tokens while preserving order
-        # First, we need to handle code patterns that include parentheses
-        import re
-        # This pattern matches:
-        # 1. Code patterns with -> or :: that might include ()
-        # 2. Standalone parentheses
-        # 3. Other non-whitespace sequences
-        token_pattern = re.compile(r'[$@_]?\w+(?:->|::)\w+\(\)|[()]|[^\s()]+')
-        
-        token_positions = []
-        for match in token_pattern.finditer(remaining):
-            token = match.group()
-            pos = match.start()
-            token_positions.append((token, pos))
-        
-        # Process each token
-        for i, (token, pos) in enumerate(token_positions):
-            # Skip placeholders
-            if (token.startswith("__PHRASE_") or 
-                token.startswith("__NEAR_") or
-                token.startswith("__INITIAL_") or
-                token.startswith("__COLUMN_")):
-                components['ordered_components'].append((token, pos))
+                initial_term = match.group('initial_term').rstrip('*')
+                if not initial_term:
+                    # A bare ^ or ^* has nothing to anchor
+                    continue
+                # Only a phrase or a plain word can follow ^, so quote
+                # anything else as a phrase
+                if not (self._is_phrase(initial_term) or self._is_bareword(initial_term)):
+                    escaped = initial_term.replace('"', '""')
+                    initial_term = f'"{escaped}"'
+                initial = f"^{initial_term}"
+                components['initial_matches'].append(initial)
+                ordered.append((initial, False))
                 continue
             
-            # Check if it's an operator
-            if token.upper() in self.FTS5_OPERATORS:
-                components['operators'].append((token.upper(), pos))
-                components['ordered_components'].append((token.upper(), pos))
+            if kind == 'paren':
+                # Keep parentheses balanced: drop a ')' with nothing open
+                # and close any groups still open at the end
+                if match.group() == '(':
+                    depth += 1
+                elif depth:
+                    depth -= 1
+                else:
+                    continue
+                ordered.append((match.group(), False))
                 continue
             
-            # Handle parentheses
-            if token in ['(', ')']:
-                components['ordered_components'].append((token, pos))
+            # Anything else, including disabled column filters and initial
+            # matches, is handled as a term
+            token = match.group()
+            
+            # Check if it's an operator. A term glued to a phrase is a piece of
+            # a larger word, never an operator, and gets quoted on output.
+            upper = token.upper()
+            start, end = match.span()
+            glued = query[start - 1:start] == '"' or query[end:end + 1] == '"'
+            if upper in self.FTS5_OPERATORS and not glued:
+                components['operators'].append(upper)
+                ordered.append((upper, False))
                 continue
             
             # Check for wildcards
             if config.allow_wildcards and '*' in token:
                 # Validate wildcard usage (must be at end of term)
                 if token.endswith('*') and token.count('*') == 1 and len(token) > 1:
+                    stem = token[:-1]
+                    if not self._is_bareword(stem):
+                        # FTS5 only takes * after a plain word or a phrase
+                        escaped = stem.replace('"', '""')
+                        token = f'"{escaped}"*'
                     components['wildcards'].append(token)
-                    components['ordered_components'].append((token, pos))
+                    ordered.append((token, False))
                 else:
                     # Invalid wildcard usage, treat as regular term
                     clean = token.replace('*', '')
-                    components['regular_terms'].append(clean)
-                    components['ordered_components'].append((clean, pos))
+                    if clean:
+                        components['regular_terms'].append(clean)
+                        ordered.append((clean, True))
             else:
                 # Regular term - keep it as is, will quote if needed later
-                clean_term = token.strip()
-                if clean_term:
-                    components['regular_terms'].append(clean_term)
-                    components['ordered_components'].append((clean_term, pos))
-        
-        # Sort ordered components by position
-        components['ordered_components'].sort(key=lambda x: x[1])
+                components['regular_terms'].append(token)
+                ordered.append((token, True))
         
+        ordered.extend([(')', False)] * depth)
         return components
     
+    def _is_bareword(self, term: str) -> bool:
+        """Check if FTS5 reads a term unquoted as a plain word, not an operator."""
+        # FTS5 operators are case sensitive, so "or" is a plain word to FTS5
+        return (self.BAREWORD_PATTERN.fullmatch(term) is not None and
+                term not in self.FTS5_OPERATORS)
+    
+    def _is_phrase(self, term: str) -> bool:
+        """Check if a term is a complete quoted phrase."""
+        return self.PHRASE_PATTERN.fullmatch(term) is not None
+    
     def _sanitize_near_terms(self, terms: str) -> str:
         """Sanitize terms within NEAR clause."""
-        # Split terms and quote each one to prevent injection
-        term_list = terms.split()
+        # Split terms and quote each one to prevent injection; whole phrases
+        # are already quoted and escaped, so they are kept as they are
         safe_terms = []
         
-        for term in term_list:
+        for match in self.NEAR_TERM_PATTERN.finditer(terms):
+            term = match.group()
+            if self._is_phrase(term):
+                safe_terms.append(term)
+                continue
+            
             # Remove any special characters that could break NEAR syntax
             clean_term = term.strip('"*^,')  # Also strip commas
             if clean_term and not clean_term.isdigit():  # Don't quote numbers (distances)
@@ -310,50 +316,31 @@ class FTS5QuerySanitizer:
     
     def _reconstruct_query(self, components: dict, config: SanitizationConfig) -> str:
         """Reconstruct sanitized query from components."""
-        if not components['ordered_components'] and not components['phrases'] and not components['near_clauses']:
-            return '""'
-        
-        # Create lookup maps for replacements
-        phrase_map = {f"__PHRASE_{i}__": phrase for i, phrase in enumerate(components['phrases'])}
-        near_map = {f"__NEAR_{i}__": near for i, near in enumerate(components['near_clauses'])}
-        initial_map = {f"__INITIAL_{i}__": init for i, init in enumerate(components['initial_matches'])}
-        column_map = {f"__COLUMN_{i}__": col for i, col in enumerate(components['column_filters'])}
+        if not components['ordered_components']:
+            return self.EMPTY_QUERY
         
         # Build result maintaining order
         result_parts = []
         
-        for component, _ in components['ordered_components']:
-            if component in phrase_map:
-                result_parts.append(phrase_map[component])
-            elif component in near_map:
-                result_parts.append(near_map[component])
-            elif component in initial_map:
-                result_parts.append(initial_map[component])
-            elif component in column_map:
-                result_parts.append(column_map[component])
-            elif component in self.FTS5_OPERATORS:
-                # Operators pass through as-is
-                result_parts.append(component)
-            elif component in ['(', ')']:
-                # Parentheses pass through
-                result_parts.append(component)
-            elif component.endswith('*') and component in components['wildcards']:
-                # Valid wildcard
+        for component, is_term in components['ordered_components']:
+            if not is_term:
+                # Phrases, NEAR clauses, operators, parentheses, filters and
+                # valid wildcards are already in their final form
                 result_parts.append(component)
+                continue
+            
+            # Regular term - quote if it contains special characters or
+            # could be confused with an operator
+            needs_quoting = (not self.QUOTE_CHARS.isdisjoint(component) or
+                             not self._is_bareword(component) or
+                             component.upper() in self.FTS5_OPERATORS)
+            
+            if needs_quoting:
+                # Escape any quotes in the term
+                escaped = component.replace('"', '""')
+                result_parts.append(f'"{escaped}"')
             else:
-                # Regular term - quote if it contains special characters
-                needs_quoting = any(c in component for c in ['$', '_', '-', '>', ':', '.', '@', '+', '#', ';', '*', '(', ')', '[', ']', '{', '}', '"'])
-                
-                # Also quote if term could be confused with operator
-                if component.upper() in self.FTS5_OPERATORS:
-                    needs_quoting = True
-                
-                if needs_quoting:
-                    # Escape any quotes in the term
-                    escaped = component.replace('"', '""')
-                    result_parts.append(f'"{escaped}"')
-                else:
-                    result_parts.append(component)
+                result_parts.append(component)
         
         return ' '.join(result_parts)
     
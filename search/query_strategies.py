@@ -2,10 +2,26 @@
 
 from abc import ABC, abstractmethod
 import re
-from typing import List, Set
-from .tokenizer_config import TOKENIZER_CHARS, CODE_OPERATORS
+from typing import List, Optional, Set
+from .tokenizer_config import CODE_OPERATORS, has_tokenizer_chars
 from .query_utils import extract_terms, escape_special_chars
 
+# Boolean operators recognised in advanced queries
+_BOOLEAN_OPERATORS = frozenset({'AND', 'OR', 'NOT'})
+
+# Standalone tokens that mark a query as already using FTS5 syntax
+_FTS5_SYNTAX_TOKENS = _BOOLEAN_OPERATORS | {'NEAR', '*', '^'}
+
+# Lowercased operators that keep normalize() from reordering terms
+_NORMALIZED_OPERATORS = frozenset({'and', 'or', 'not', 'near'})
+
+# Common words dropped by keyword extraction
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
+    'to', 'for', 'of', 'with', 'by', 'from', 'as', 'is',
+    'was', 'are', 'were', 'been', 'be', 'being'
+})
+
 class QueryStrategy(ABC):
     """Abstract base class for query building strategies."""
     
@@ -31,20 +47,15 @@ class QueryStrategy(ABC):
         Returns:
             Normalized query string
         """
-        # Convert to lowercase and strip
-        normalized = query.lower().strip()
-        
-        # Remove extra whitespace
-        normalized = re.sub(r'\s+', ' ', normalized)
+        # Convert to lowercase; splitting also drops extra whitespace
+        terms = query.lower().split()
         
         # Sort terms for consistency unless it has operators
         # Check for operators as whole words
-        has_operators = any(f' {op} ' in f' {normalized} ' for op in ['and', 'or', 'not', 'near'])
-        if not has_operators:
-            terms = normalized.split()
-            normalized = ' '.join(sorted(terms))
+        if _NORMALIZED_OPERATORS.isdisjoint(terms):
+            terms.sort()
         
-        return normalized
+        return ' '.join(terms)
 
 class DefaultQueryStrategy(QueryStrategy):
     """Basic FTS5 query building with minimal processing."""
@@ -61,8 +72,24 @@ class DefaultQueryStrategy(QueryStrategy):
 class CodeAwareQueryStrategy(QueryStrategy):
     """Query strategy that preserves code-specific patterns and operators."""
     
+    # Tokens of a query that already uses FTS5 syntax. Matches:
+    # quoted phrases | operators | NEAR function | regular words/code patterns
+    ADVANCED_TOKEN_PATTERN = re.compile(
+        r'"[^"]+"|'                           # Quoted phrases
+        r'(?<![\w$@._:#])(?:AND|OR|NOT)(?![\w$@._:#])|'  # Operators with custom boundaries
+        r'NEAR\([^)]+\)|'                   # NEAR function
+        r'[$@_]?\w[\w$@._:#]*(?:->)?[\w$@._:#]*\*?',  # Words and code patterns
+        re.IGNORECASE
+    )
+    
     def build(self, query: str) -> str:
         """Build query preserving code patterns."""
+        # A single bare word (the most common query) passes through unchanged,
+        # operators included, so skip term extraction entirely
+        stripped = query.strip()
+        if stripped.isalnum():
+            return stripped
+        
         # Handle exact phrases first
         if query.startswith('"') and query.endswith('"'):
             return query
@@ -77,51 +104,54 @@ class CodeAwareQueryStrategy(QueryStrategy):
     
     def _contains_fts5_operators(self, query: str) -> bool:
         """Check if query contains FTS5 operators."""
-        operators = {'AND', 'OR', 'NOT', 'NEAR', '*', '^'}
-        tokens = query.split()
-        return any(token in operators for token in tokens)
+        return not _FTS5_SYNTAX_TOKENS.isdisjoint(query.split())
     
     def _process_advanced_query(self, query: str) -> str:
         """Process query that already contains FTS5 operators."""
-        import re
-        # This regex finds:
-        # 1. Quoted phrases
-        # 2. FTS5 operators (AND, OR, NOT)
-        # 3. NEAR() function calls
-        # 4. Words (including those with * and code patterns)
-        # Match sequences that include word chars and code special chars
-        # Use a more specific pattern for tokens
-        # Match: quoted phrases | operators | NEAR function | regular words/code patterns
-        token_pattern = re.compile(
-            r'"[^"]+"|'                           # Quoted phrases
-            r'(?<![\w$@._:#])(?:AND|OR|NOT)(?![\w$@._:#])|'  # Operators with custom boundaries
-            r'NEAR\([^)]+\)|'                   # NEAR function
-            r'[$@_]?\w[\w$@._:#]*(?:->)?[\w$@._:#]*\*?',  # Words and code patterns
-            re.IGNORECASE
-        )
-        
         parts = []
+        tokens = []
         last_end = 0
-        for match in token_pattern.finditer(query):
+        for match in self.ADVANCED_TOKEN_PATTERN.finditer(query):
             # Add any non-matching text (like spaces)
             parts.append(query[last_end:match.start()])
             
             token = match.group(0)
             # Check if the token is a code pattern that isn't already quoted or an operator
             if (not token.startswith('"') and 
-                not token.upper() in {'AND', 'OR', 'NOT'} and 
+                token.upper() not in _BOOLEAN_OPERATORS and 
                 not token.upper().startswith('NEAR') and
-                any(char in token for char in TOKENIZER_CHARS)):
-                parts.append(f'"{escape_special_chars(token)}"')
-            else:
-                parts.append(token)
+                has_tokenizer_chars(token)):
+                token = f'"{escape_special_chars(token)}"'
+            parts.append(token)
+            tokens.append(token)
             last_end = match.end()
         
         # Add any trailing text
         parts.append(query[last_end:])
         
+        # A plain "x OR y OR x" chain matches the same rows without its
+        # repeated operands, and each one dropped saves a posting-list scan
+        if not ''.join(parts[::2]).strip():
+            deduplicated = self._dedupe_or_chain(tokens)
+            if deduplicated is not None:
+                return deduplicated
+        
         return ''.join(parts).strip()
     
+    def _dedupe_or_chain(self, tokens: List[str]) -> Optional[str]:
+        """Drop repeated operands of a flat OR chain, or None if there are none."""
+        operands = tokens[::2]
+        # FTS5 operators are case sensitive, so only uppercase OR joins the chain
+        if (len(tokens) % 2 == 0 or
+                any(token != 'OR' for token in tokens[1::2]) or
+                any(operand.upper() in _BOOLEAN_OPERATORS for operand in operands)):
+            return None
+        
+        unique = list(dict.fromkeys(operands))
+        if len(unique) == len(operands):
+            return None
+        return ' OR '.join(unique)
+    
     def _process_code_query(self, query: str) -> str:
         """Process as code-aware query."""
         terms = extract_terms(query)
@@ -129,7 +159,7 @@ class CodeAwareQueryStrategy(QueryStrategy):
         
         for term in terms:
             # Check if the term is a code pattern or a multi-word phrase
-            is_code = any(char in term for char in TOKENIZER_CHARS)
+            is_code = has_tokenizer_chars(term)
             is_phrase = ' ' in term
             
             if is_code or is_phrase:
@@ -155,18 +185,12 @@ class FallbackStrategy(QueryStrategy):
     
     def prefix_match_fallback(self, query: str) -> str:
         """Add prefix matching to all terms."""
-        terms = extract_terms(query)
-        prefix_terms = []
-        
-        for term in terms:
-            escaped = escape_special_chars(term)
-            # Only add * if term doesn't already have it
-            if not escaped.endswith('*'):
-                prefix_terms.append(f'{escaped}*')
-            else:
-                prefix_terms.append(escaped)
-        
-        return ' '.join(prefix_terms)
+        # Escaping only doubles quotes, so it can run once over the joined
+        # result; only add * if a term doesn't already have it
+        return escape_special_chars(' '.join(
+            term if term.endswith('*') else f'{term}*'
+            for term in extract_terms(query)
+        ))
     
     def or_search_fallback(self, query: str) -> str:
         """Convert AND search to OR search."""
@@ -174,8 +198,7 @@ class FallbackStrategy(QueryStrategy):
         if len(terms) <= 1:
             return escape_special_chars(query)
         
-        escaped_terms = [escape_special_chars(term) for term in terms]
-        return ' OR '.join(escaped_terms)
+        return escape_special_chars(' OR '.join(terms))
     
     def keyword_extraction_fallback(self, query: str) -> str:
         """Extract key terms and search for any."""
@@ -186,23 +209,15 @@ class FallbackStrategy(QueryStrategy):
         if not keywords:
             return self.or_search_fallback(query)
         
-        escaped_keywords = [escape_special_chars(kw) for kw in keywords]
-        return ' OR '.join(escaped_keywords)
+        return escape_special_chars(' OR '.join(keywords))
     
     def _extract_keywords(self, terms: List[str]) -> List[str]:
         """Extract likely important terms."""
-        # Common words to filter out
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
-            'to', 'for', 'of', 'with', 'by', 'from', 'as', 'is',
-            'was', 'are', 'were', 'been', 'be', 'being'
-        }
-        
         keywords = []
         for term in terms:
             term_lower = term.lower()
             # Keep if not a stop word or contains special chars (likely code)
-            if term_lower not in stop_words or any(c in term for c in TOKENIZER_CHARS):
+            if term_lower not in _STOP_WORDS or has_tokenizer_chars(term):
                 keywords.append(term)
         
         return keywords
@@ -1,7 +1,14 @@
 """Utilities for query processing and manipulation."""
 
 import re
-from typing import List, Set
+from functools import lru_cache
+from typing import List, Set, Tuple
+
+# Operators reported by detect_operators
+_FTS5_OPERATORS = frozenset({'AND', 'OR', 'NOT', 'NEAR'})
+
+# Quoted phrases pulled out of a query before splitting on whitespace
+_QUOTED_PHRASE_RE = re.compile(r'"([^"]+)"')
 
 def escape_special_chars(query: str) -> str:
     """Escape special characters for FTS5."""
@@ -15,13 +22,18 @@ def escape_special_chars(query: str) -> str:
 
 def extract_terms(query: str) -> List[str]:
     """Extract individual terms from query."""
+    # Fresh list per call; the cached tuple is shared between callers
+    return list(_extract_terms(query))
+
+@lru_cache(maxsize=1024)
+def _extract_terms(query: str) -> Tuple[str, ...]:
+    """Cached term extraction; fallback variants re-split the same query."""
     # Handle quoted phrases
     phrases = []
     remaining = query
     
     # Extract quoted phrases first
-    quote_pattern = r'"([^"]+)"'
-    for match in re.finditer(quote_pattern, query):
+    for match in _QUOTED_PHRASE_RE.finditer(query):
         phrases.append(match.group(1))
         remaining = remaining.replace(match.group(0), ' ')
     
@@ -29,24 +41,15 @@ def extract_terms(query: str) -> List[str]:
     terms = remaining.split()
     
     # Combine phrases and terms
-    all_terms = phrases + [t for t in terms if t]
-    
-    return all_terms
+    return tuple(phrases) + tuple(t for t in terms if t)
 
 def detect_operators(query: str) -> Set[str]:
     """Detect FTS5 operators in query."""
-    operators = {'AND', 'OR', 'NOT', 'NEAR'}
-    found = set()
-    
-    # Split by whitespace but also check for NEAR( pattern
+    # Standalone operator tokens, plus the NEAR( function form
+    found = set(query.split()) & _FTS5_OPERATORS
     if 'NEAR(' in query:
         found.add('NEAR')
     
-    tokens = query.split()
-    for token in tokens:
-        if token in operators:
-            found.add(token)
-    
     return found
 
 def normalize_whitespace(query: str) -> str:
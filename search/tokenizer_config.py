@@ -28,15 +28,17 @@ CODE_PATTERNS = [
     r'#\w+',                    # #identifier
 ]
 
+# Set form of TOKENIZER_CHARS so a term is classified in one C-level pass
+_TOKENIZER_CHAR_SET = frozenset(TOKENIZER_CHARS)
+
+# CODE_PATTERNS fused into one alternation so a term is scanned once
+_CODE_PATTERN_RE = re.compile('|'.join(CODE_PATTERNS))
+
+def has_tokenizer_chars(term: str) -> bool:
+    """Check if a term contains any of the tokenizer's special chars."""
+    return not _TOKENIZER_CHAR_SET.isdisjoint(term)
+
 def is_code_pattern(term: str) -> bool:
     """Check if a term looks like a code pattern."""
-    # Contains tokenizer special chars
-    if any(char in term for char in TOKENIZER_CHARS):
-        return True
-    
-    # Matches code patterns
-    for pattern in CODE_PATTERNS:
-        if re.search(pattern, term):
-            return True
-    
-    return False
\ No newline at end of file
+    # Contains tokenizer special chars, else matches any code pattern
+    return has_tokenizer_chars(term) or _CODE_PATTERN_RE.search(term) is not None
\ No newline at end of file
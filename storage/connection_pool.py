@@ -21,15 +21,21 @@ class ConnectionPool:
     manage connections efficiently for read-heavy workloads.
     """
     
-    def __init__(self, db_path: str, max_connections: int = 5, timeout: int = 10):
+    def __init__(self, db_path: str, max_connections: int = 5, timeout: int = 10,
+                 uri: bool = False):
         """Initialize connection pool.
         
         Args:
-            db_path: Path to the SQLite database file
+            db_path: Path to the SQLite database file, or a "file:" URI when
+                uri is True
             max_connections: Maximum number of connections to maintain
             timeout: Timeout in seconds when waiting for a connection
+            uri: Open db_path as a SQLite URI, e.g.
+                "file:name?mode=memory&cache=shared" for an in-memory
+                database shared by all pooled connections
         """
         self.db_path = db_path
+        self.uri = uri
         self.max_connections = max_connections
         self.timeout = timeout
         self._pool: Queue = Queue(maxsize=max_connections)
@@ -42,10 +48,10 @@ class ConnectionPool:
         # Ensure the directory exists before attempting to connect
         import os
         db_dir = os.path.dirname(self.db_path)
-        if db_dir and not os.path.exists(db_dir):
+        if db_dir and not self.uri and not os.path.exists(db_dir):
             os.makedirs(db_dir, exist_ok=True)
             
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, uri=self.uri)
         conn.row_factory = sqlite3.Row
         
         # Enable foreign keys
@@ -7,8 +7,8 @@ import dataclasses
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import logging
-import threading
 import signal
+import time
 from contextlib import contextmanager
 
 from .backend import StorageBackend
@@ -42,20 +42,90 @@ class SqliteBackend(StorageBackend):
         'other_notes', 'full_content', 'documented_at_commit'
     }
     
-    def __init__(self, db_path: str, max_connections: int = 5, search_service: Optional[SearchService] = None):
+    # Insert-or-update of one file documentation row
+    _UPSERT_DOC_SQL = """
+        INSERT INTO files (
+            dataset_id, filepath, filename, overview, ddd_context,
+            functions, exports, imports, types_interfaces_classes,
+            constants, dependencies, other_notes, full_content,
+            documented_at_commit, documented_at
+        ) VALUES (
+            :dataset, :filepath, :filename, :overview, :ddd_context,
+            :functions, :exports, :imports, :types_interfaces_classes,
+            :constants, :dependencies, :other_notes, :full_content,
+            :documented_at_commit, CURRENT_TIMESTAMP
+        )
+        ON CONFLICT(dataset_id, filepath) DO UPDATE SET
+            filename=excluded.filename,
+            overview=excluded.overview,
+            ddd_context=excluded.ddd_context,
+            functions=excluded.functions,
+            exports=excluded.exports,
+            imports=excluded.imports,
+            types_interfaces_classes=excluded.types_interfaces_classes,
+            constants=excluded.constants,
+            dependencies=excluded.dependencies,
+            other_notes=excluded.other_notes,
+            full_content=excluded.full_content,
+            documented_at_commit=excluded.documented_at_commit,
+            documented_at=CURRENT_TIMESTAMP
+    """
+    
+    # Triggers that keep the external-content FTS5 table in sync with files
+    _FTS_TRIGGERS = {
+        'files_fts_insert': """
+        CREATE TRIGGER IF NOT EXISTS files_fts_insert AFTER INSERT ON files
+        BEGIN
+            INSERT INTO files_fts(rowid, dataset_id, filepath, filename, overview, 
+                ddd_context, functions, exports, imports, types_interfaces_classes,
+                constants, dependencies, other_notes, full_content)
+            VALUES (new.rowid, new.dataset_id, new.filepath, new.filename, new.overview,
+                new.ddd_context, new.functions, new.exports, new.imports, 
+                new.types_interfaces_classes, new.constants, new.dependencies, 
+                new.other_notes, new.full_content);
+        END
+        """,
+        'files_fts_delete': """
+        CREATE TRIGGER IF NOT EXISTS files_fts_delete AFTER DELETE ON files
+        BEGIN
+            DELETE FROM files_fts WHERE rowid = old.rowid;
+        END
+        """,
+        'files_fts_update': """
+        CREATE TRIGGER IF NOT EXISTS files_fts_update AFTER UPDATE ON files
+        BEGIN
+            DELETE FROM files_fts WHERE rowid = old.rowid;
+            INSERT INTO files_fts(rowid, dataset_id, filepath, filename, overview, 
+                ddd_context, functions, exports, imports, types_interfaces_classes,
+                constants, dependencies, other_notes, full_content)
+            VALUES (new.rowid, new.dataset_id, new.filepath, new.filename, new.overview,
+                new.ddd_context, new.functions, new.exports, new.imports, 
+                new.types_interfaces_classes, new.constants, new.dependencies, 
+                new.other_notes, new.full_content);
+        END
+        """,
+    }
+    
+    # VM instructions between deadline checks while a timeout is active
+    _PROGRESS_HANDLER_STEPS = 1000
+    
+    def __init__(self, db_path: str, max_connections: int = 5, search_service: Optional[SearchService] = None,
+                 uri: bool = False):
         """Initialize SQLite backend.
         
         Args:
-            db_path: Path to the SQLite database file
+            db_path: Path to the SQLite database file, or a "file:" URI when
+                uri is True
             max_connections: Maximum number of connections in pool
             search_service: Optional SearchService instance for search operations
+            uri: Open db_path as a SQLite URI instead of a file path
         """
         self.db_path = db_path
-        self.connection_pool = ConnectionPool(db_path, max_connections=max_connections)
+        self.connection_pool = ConnectionPool(db_path, max_connections=max_connections, uri=uri)
         
         # Ensure database directory exists
         db_dir = os.path.dirname(db_path)
-        if db_dir:
+        if db_dir and not uri:
             os.makedirs(db_dir, exist_ok=True)
             
         # Initialize schema
@@ -165,7 +235,9 @@ class SqliteBackend(StorageBackend):
     def _query_timeout(self, conn: sqlite3.Connection, timeout_ms: Optional[int] = None):
         """Context manager for query timeout handling.
         
-        Uses SQLite's interrupt mechanism to cancel long-running queries.
+        Installs a SQLite progress handler that aborts the running statement
+        once the deadline has passed. SQLite calls it from inside the VM every
+        _PROGRESS_HANDLER_STEPS instructions, so no timer thread is needed.
         
         Args:
             conn: SQLite connection to monitor
@@ -179,32 +251,23 @@ class SqliteBackend(StorageBackend):
             yield conn
             return
             
-        timer = None
-        interrupted = threading.Event()
+        deadline = time.monotonic() + timeout_ms / 1000.0
         
-        def interrupt_query():
-            """Interrupt the SQLite query after timeout."""
-            logger.warning(f"Query timeout after {timeout_ms}ms, interrupting...")
-            interrupted.set()
-            try:
-                conn.interrupt()
-            except Exception as e:
-                logger.error(f"Failed to interrupt query: {e}")
+        def check_deadline() -> int:
+            """Return non-zero to make SQLite interrupt the statement."""
+            return time.monotonic() >= deadline
         
+        conn.set_progress_handler(check_deadline, self._PROGRESS_HANDLER_STEPS)
         try:
-            # Schedule the interrupt
-            timer = threading.Timer(timeout_ms / 1000.0, interrupt_query)
-            timer.start()
-            
             yield conn
-            
         finally:
-            # Cancel timer if query completed before timeout
-            if timer and timer.is_alive():
-                timer.cancel()
-                
-            # Check if we were interrupted
-            if interrupted.is_set():
+            # Pooled connections are reused, so always remove the handler
+            conn.set_progress_handler(None, 0)
+            
+            # Covers both an interrupted statement and a block that overran
+            # between statements
+            if time.monotonic() >= deadline:
+                logger.warning("Query timeout after %sms", timeout_ms)
                 raise TimeoutError(f"Query exceeded timeout of {timeout_ms}ms")
         
     def _doc_to_sql_params(self, doc: FileDocumentation) -> Dict[str, Any]:
@@ -501,33 +564,7 @@ class SqliteBackend(StorageBackend):
             sql_data = self._doc_to_sql_params(doc)
             
             with self.connection_pool.transaction() as conn:
-                conn.execute("""
-                    INSERT INTO files (
-                        dataset_id, filepath, filename, overview, ddd_context,
-                        functions, exports, imports, types_interfaces_classes,
-                        constants, dependencies, other_notes, full_content,
-                        documented_at_commit, documented_at
-                    ) VALUES (
-                        :dataset, :filepath, :filename, :overview, :ddd_context,
-                        :functions, :exports, :imports, :types_interfaces_classes,
-                        :constants, :dependencies, :other_notes, :full_content,
-                        :documented_at_commit, CURRENT_TIMESTAMP
-                    )
-                    ON CONFLICT(dataset_id, filepath) DO UPDATE SET
-                        filename=excluded.filename,
-                        overview=excluded.overview,
-                        ddd_context=excluded.ddd_context,
-                        functions=excluded.functions,
-                        exports=excluded.exports,
-                        imports=excluded.imports,
-                        types_interfaces_classes=excluded.types_interfaces_classes,
-                        constants=excluded.constants,
-                        dependencies=excluded.dependencies,
-                        other_notes=excluded.other_notes,
-                        full_content=excluded.full_content,
-                        documented_at_commit=excluded.documented_at_commit,
-                        documented_at=CURRENT_TIMESTAMP
-                """, sql_data)
+                conn.execute(self._UPSERT_DOC_SQL, sql_data)
                 
             return True
             
@@ -535,18 +572,14 @@ class SqliteBackend(StorageBackend):
             logger.error(f"Failed to insert documentation: {e}")
             return False
             
-    def insert_documentation_batch(self, docs: List[FileDocumentation]) -> BatchOperationResult:
-        """Insert or update multiple file documentations efficiently."""
+    def _prepare_batch(self, docs: List[FileDocumentation]) -> Tuple[BatchOperationResult, List[Dict[str, Any]]]:
+        """Convert documents to SQL parameters, recording conversion failures."""
         result = BatchOperationResult(
             total_items=len(docs),
             successful=0,
             failed=0
         )
         
-        if not docs:
-            return result
-            
-        # Prepare data for batch insert
         batch_data = []
         for doc in docs:
             try:
@@ -555,6 +588,11 @@ class SqliteBackend(StorageBackend):
                 result.failed += 1
                 result.add_error(doc.filepath, str(e))
                 
+        return result, batch_data
+        
+    def insert_documentation_batch(self, docs: List[FileDocumentation]) -> BatchOperationResult:
+        """Insert or update multiple file documentations efficiently."""
+        result, batch_data = self._prepare_batch(docs)
         if not batch_data:
             return result
             
@@ -562,36 +600,8 @@ class SqliteBackend(StorageBackend):
         with self.connection_pool.transaction() as conn:
             batch_tx = BatchTransaction(conn, batch_size=500)
             
-            query = """
-                INSERT INTO files (
-                    dataset_id, filepath, filename, overview, ddd_context,
-                    functions, exports, imports, types_interfaces_classes,
-                    constants, dependencies, other_notes, full_content,
-                    documented_at_commit, documented_at
-                ) VALUES (
-                    :dataset, :filepath, :filename, :overview, :ddd_context,
-                    :functions, :exports, :imports, :types_interfaces_classes,
-                    :constants, :dependencies, :other_notes, :full_content,
-                    :documented_at_commit, CURRENT_TIMESTAMP
-                )
-                ON CONFLICT(dataset_id, filepath) DO UPDATE SET
-                    filename=excluded.filename,
-                    overview=excluded.overview,
-                    ddd_context=excluded.ddd_context,
-                    functions=excluded.functions,
-                    exports=excluded.exports,
-                    imports=excluded.imports,
-                    types_interfaces_classes=excluded.types_interfaces_classes,
-                    constants=excluded.constants,
-                    dependencies=excluded.dependencies,
-                    other_notes=excluded.other_notes,
-                    full_content=excluded.full_content,
-                    documented_at_commit=excluded.documented_at_commit,
-                    documented_at=CURRENT_TIMESTAMP
-            """
-            
             try:
-                affected = batch_tx.execute_batch(query, batch_data)
+                affected = batch_tx.execute_batch(self._UPSERT_DOC_SQL, batch_data)
                 result.successful = len(batch_data)
                 
             except Exception as e:
@@ -602,6 +612,38 @@ class SqliteBackend(StorageBackend):
                 
         return result
         
+    def bulk_load(self, docs: List[FileDocumentation]) -> BatchOperationResult:
+        """Insert or update many file documentations with a single FTS5 rebuild.
+        
+        The FTS5 sync triggers are dropped while the rows are written, so the
+        content is tokenized once by a full index rebuild instead of once per
+        row. The rebuild covers every dataset, so this pays off for large
+        loads; use insert_documentation_batch to add a few files to a big
+        database. Everything runs in one transaction, so other connections
+        never see the table without its triggers.
+        """
+        result, batch_data = self._prepare_batch(docs)
+        if not batch_data:
+            return result
+            
+        with self.connection_pool.transaction() as conn:
+            try:
+                for trigger_name in self._FTS_TRIGGERS:
+                    conn.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+                conn.executemany(self._UPSERT_DOC_SQL, batch_data)
+                conn.execute("INSERT INTO files_fts(files_fts) VALUES('rebuild')")
+                for trigger_sql in self._FTS_TRIGGERS.values():
+                    conn.execute(trigger_sql)
+                result.successful = len(batch_data)
+                
+            except Exception as e:
+                logger.error(f"Bulk load failed: {e}")
+                result.failed = len(batch_data)
+                result.add_error("batch_operation", str(e))
+                raise
+                
+        return result
+        
     def update_documentation(self, filepath: str, dataset: str, updates: Dict[str, Any]) -> bool:
         """Update specific fields of existing documentation."""
         if not updates:
@@ -843,39 +885,8 @@ class SqliteBackend(StorageBackend):
             """)
             
             # Create triggers to keep FTS5 in sync with files table
-            conn.execute("""
-                CREATE TRIGGER IF NOT EXISTS files_fts_insert AFTER INSERT ON files
-                BEGIN
-                    INSERT INTO files_fts(rowid, dataset_id, filepath, filename, overview, 
-                        ddd_context, functions, exports, imports, types_interfaces_classes,
-                        constants, dependencies, other_notes, full_content)
-                    VALUES (new.rowid, new.dataset_id, new.filepath, new.filename, new.overview,
-                        new.ddd_context, new.functions, new.exports, new.imports, 
-                        new.types_interfaces_classes, new.constants, new.dependencies, 
-                        new.other_notes, new.full_content);
-                END
-            """)
-            
-            conn.execute("""
-                CREATE TRIGGER IF NOT EXISTS files_fts_delete AFTER DELETE ON files
-                BEGIN
-                    DELETE FROM files_fts WHERE rowid = old.rowid;
-                END
-            """)
-            
-            conn.execute("""
-                CREATE TRIGGER IF NOT EXISTS files_fts_update AFTER UPDATE ON files
-                BEGIN
-                    DELETE FROM files_fts WHERE rowid = old.rowid;
-                    INSERT INTO files_fts(rowid, dataset_id, filepath, filename, overview, 
-                        ddd_context, functions, exports, imports, types_interfaces_classes,
-                        constants, dependencies, other_notes, full_content)
-                    VALUES (new.rowid, new.dataset_id, new.filepath, new.filename, new.overview,
-                        new.ddd_context, new.functions, new.exports, new.imports, 
-                        new.types_interfaces_classes, new.constants, new.dependencies, 
-                        new.other_notes, new.full_content);
-                END
-            """)
+            for trigger_sql in self._FTS_TRIGGERS.values():
+                conn.execute(trigger_sql)
         
         # Schema version table
         conn.execute("""
@@ -8,6 +8,7 @@ from functools import lru_cache
 from storage.sqlite_storage import CodeQueryServer
 from analysis.analyzer import FileAnalyzer
 from app.job_storage import JobStorage
+from helpers.log_sanitizer import SanitizingFilter
 
 # Initialize Huey with SQLite backend
 # This creates a separate database for job queue management
@@ -20,6 +21,8 @@ huey = SqliteHuey(
 # Configure logging for tasks
 logger = logging.getLogger('code-query.tasks')
 logger.setLevel(logging.INFO)
+# Error messages can carry Claude CLI stderr, so mask secrets before logging
+logger.addFilter(SanitizingFilter())
 
 # Add file handler for worker logs - will be set up properly by worker manager
 def setup_logging(log_file_path: str):
@@ -34,7 +37,7 @@ def setup_logging(log_file_path: str):
 def get_storage_server(project_root: str) -> CodeQueryServer:
     """Creates and caches CodeQueryServer instances."""
     db_path = os.path.join(project_root, '.code-query', 'code_data.db')
-    logger.info(f"Creating or reusing storage connection for project: {project_root}")
+    logger.info("Creating or reusing storage connection for project: %s", project_root)
     return CodeQueryServer(db_path)
 
 @lru_cache(maxsize=8)
@@ -47,7 +50,7 @@ def get_project_config(project_root: str) -> Dict[str, Any]:
 @lru_cache(maxsize=8)
 def get_job_storage(db_path: str) -> JobStorage:
     """Creates and caches JobStorage instances."""
-    logger.info(f"Creating or reusing job storage connection for db: {db_path}")
+    logger.info("Creating or reusing job storage connection for db: %s", db_path)
     return JobStorage(db_path)
 
 @huey.task(retries=2, retry_delay=60)
@@ -72,7 +75,7 @@ def process_file_documentation(
     Returns:
         Dict with success status and any error messages
     """
-    logger.info(f"Processing documentation for {filepath} (Job ID: {job_id})...")
+    logger.info("Processing documentation for %s (Job ID: %s)...", filepath, job_id)
     
     # Get dependencies
     storage = get_storage_server(project_root)
@@ -90,19 +93,19 @@ def process_file_documentation(
         result = analyzer.analyze_and_document(filepath, dataset_name, commit_hash)
         
         success = True
-        logger.info(f"✓ Completed documentation for {filepath}")
+        logger.info("✓ Completed documentation for %s", filepath)
         return {"success": True, "filepath": filepath, "job_id": job_id}
         
     except (PermissionError, FileNotFoundError, ValueError, KeyError) as e:
         # Non-retriable errors - don't trigger Huey retry
         error_message = str(e)
-        logger.error(f"✗ Validation failed for {filepath}, will not retry: {error_message}")
+        logger.error("✗ Validation failed for %s, will not retry: %s", filepath, error_message)
         return {"success": False, "filepath": filepath, "error": error_message, "job_id": job_id}
         
     except Exception as e:
         # Retriable errors - re-raise for Huey
         error_message = str(e)
-        logger.error(f"✗ Task failed for {filepath} in job {job_id}: {error_message}")
+        logger.error("✗ Task failed for %s in job %s: %s", filepath, job_id, error_message)
         raise
         
     finally:
@@ -118,7 +121,7 @@ def process_file_documentation(
                     commit_hash=commit_hash
                 )
             except Exception as e:
-                logger.warning(f"Failed to update job progress for {filepath}: {e}")
+                logger.warning("Failed to update job progress for %s: %s", filepath, e)
 
 @huey.task()
 def process_documentation_batch(
@@ -152,7 +155,7 @@ def process_documentation_batch(
         )
         task_ids.append(str(task.id))
     
-    logger.info(f"Enqueued {len(files)} files for job {job_id}")
+    logger.info("Enqueued %d files for job %s", len(files), job_id)
     
     return {
         "job_id": job_id,
@@ -253,7 +253,23 @@ class TestConnectionPool(unittest.TestCase):
                 pass
                 
         self.assertIn("closed", str(ctx.exception))
-
+        
+    def test_shared_memory_uri(self):
+        """Test that pooled connections share one in-memory database via a URI."""
+        pool = ConnectionPool(
+            f"file:pool_{id(self)}?mode=memory&cache=shared", max_connections=2, uri=True
+        )
+        
+        with pool.get_connection() as conn1, pool.get_connection() as conn2:
+            self.assertIsNot(conn1, conn2)
+            conn1.execute("CREATE TABLE test (id INTEGER)")
+            conn1.execute("INSERT INTO test VALUES (1)")
+            conn1.commit()
+        
+            self.assertEqual(conn2.execute("SELECT COUNT(*) FROM test").fetchone()[0], 1)
+        
+        pool.close()
+        
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
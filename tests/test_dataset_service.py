@@ -1,7 +1,8 @@
 """Tests for dataset service implementation."""
 
 import unittest
-from unittest.mock import Mock, MagicMock, patch, call
+from collections import namedtuple
+from unittest.mock import Mock, MagicMock, patch, call, sentinel
 from datetime import datetime
 import tempfile
 import os
@@ -15,7 +16,29 @@ from dataset.dataset_validator import DatasetValidator
 from dataset.worktree_handler import WorktreeHandler
 from dataset.dataset_sync import DatasetSynchronizer
 from storage.backend import StorageBackend
-from storage.models import DatasetMetadata, FileDocumentation
+from storage.models import DatasetMetadata
+
+
+# Module-level fixtures are shared by every test (and by every worker when the
+# suite runs in parallel), so they must stay immutable. Anything a test mutates,
+# including mocks, is built per test in setUp.
+
+# Timestamps are never asserted on, so share one fixed value instead of
+# calling datetime.now() for every fixture object
+_FIXED_TS = datetime(2024, 1, 1)
+
+# Minimal stand-in for FileDocumentation in diff tests, which only compare hashes
+_Doc = namedtuple('_Doc', 'filepath content_hash')
+
+
+def _fast_meta(**fields):
+    """Build a DatasetMetadata stub without running the dataclass __init__.
+    
+    Fields that are omitted fall back to the dataclass defaults.
+    """
+    metadata = object.__new__(DatasetMetadata)
+    metadata.__dict__.update(fields)
+    return metadata
 
 
 class TestDatasetService(unittest.TestCase):
@@ -35,6 +58,14 @@ class TestDatasetService(unittest.TestCase):
         import shutil
         shutil.rmtree(self.temp_dir, ignore_errors=True)
         
+    def _make_txn(self, txn_storage):
+        """Wire storage.transaction() to yield txn_storage as a context manager."""
+        txn = MagicMock()
+        txn.__enter__.return_value = txn_storage
+        txn.__exit__.return_value = None
+        self.mock_storage.transaction.return_value = txn
+        return txn
+        
     def test_create_dataset_success(self):
         """Test successful dataset creation."""
         # Mock storage responses
@@ -42,12 +73,12 @@ class TestDatasetService(unittest.TestCase):
         self.mock_storage.create_dataset.return_value = True
         
         # Mock the created dataset metadata
-        created_metadata = DatasetMetadata(
+        created_metadata = _fast_meta(
             dataset_id="test-dataset",
             source_dir=self.temp_dir,
             dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=0
         )
         self.mock_storage.get_dataset_metadata.side_effect = [None, created_metadata]
@@ -69,12 +100,12 @@ class TestDatasetService(unittest.TestCase):
     def test_create_dataset_already_exists(self):
         """Test dataset creation when it already exists."""
         # Mock existing dataset
-        existing = DatasetMetadata(
+        existing = _fast_meta(
             dataset_id="test-dataset",
             source_dir="/some/path",
             dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=10
         )
         self.mock_storage.get_dataset_metadata.return_value = existing
@@ -110,13 +141,13 @@ class TestDatasetService(unittest.TestCase):
         self.mock_storage.create_dataset.return_value = True
         
         # Mock the created dataset
-        created_metadata = DatasetMetadata(
+        created_metadata = _fast_meta(
             dataset_id="test-dataset",
             source_dir=self.temp_dir,
             dataset_type="worktree",
             source_branch="feature-branch",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=0
         )
         self.mock_storage.get_dataset_metadata.side_effect = [None, created_metadata]
@@ -136,23 +167,23 @@ class TestDatasetService(unittest.TestCase):
     def test_fork_dataset_success(self):
         """Test successful dataset forking."""
         # Mock source dataset
-        source_metadata = DatasetMetadata(
+        source_metadata = _fast_meta(
             dataset_id="source-dataset",
             source_dir="/source/path",
             dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=5
         )
         
         # Mock the forked dataset metadata
-        forked_metadata = DatasetMetadata(
+        forked_metadata = _fast_meta(
             dataset_id="forked-dataset",
             source_dir="/source/path",
             dataset_type="fork",
             parent_dataset_id="source-dataset",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=5
         )
         
@@ -169,8 +200,7 @@ class TestDatasetService(unittest.TestCase):
             source_metadata,  # First call to check source exists
             forked_metadata   # Second call to return forked dataset
         ]
-        self.mock_storage.transaction.return_value.__enter__ = Mock(return_value=mock_txn_storage)
-        self.mock_storage.transaction.return_value.__exit__ = Mock(return_value=None)
+        self._make_txn(mock_txn_storage)
         
         # Mock synchronizer
         with patch('dataset.dataset_service.DatasetSynchronizer') as MockSync:
@@ -202,28 +232,28 @@ class TestDatasetService(unittest.TestCase):
     def test_sync_datasets_success(self):
         """Test successful dataset synchronization."""
         # Mock datasets
-        source = DatasetMetadata(
+        source = _fast_meta(
             dataset_id="source",
             source_dir="/source",
             dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=10
         )
-        target = DatasetMetadata(
+        target = _fast_meta(
             dataset_id="target",
             source_dir="/target",
             dataset_type="fork",
             parent_dataset_id="source",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=8
         )
         
         self.mock_storage.get_dataset_metadata.side_effect = [source, target]
         
         # Mock synchronizer
-        with patch.object(self.service.synchronizer, 'sync_changes', return_value=3):
+        with patch.object(self.service.synchronizer, 'sync_changes', new=Mock(return_value=3)):
             # Sync datasets
             sync_op = self.service.sync_datasets(
                 "source", "target", "main", "feature-branch"
@@ -237,44 +267,28 @@ class TestDatasetService(unittest.TestCase):
             
     def test_sync_datasets_bidirectional_not_implemented(self):
         """Test bidirectional sync raises NotImplementedError."""
-        # Mock datasets
-        source = DatasetMetadata(
-            dataset_id="source",
-            source_dir="/source",
-            dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
-            files_count=10
-        )
-        target = DatasetMetadata(
-            dataset_id="target",
-            source_dir="/target",
-            dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
-            files_count=10
-        )
-        
-        self.mock_storage.get_dataset_metadata.side_effect = [source, target]
-        
-        # Should raise NotImplementedError
-        with self.assertRaises(NotImplementedError) as ctx:
-            self.service.sync_datasets(
-                "source", "target", "main", "main",
-                direction=SyncDirection.BIDIRECTIONAL
-            )
+        # Only existence of both datasets is checked before the direction is
+        # rejected, so opaque sentinels are enough
+        with patch.object(self.service, 'get_dataset',
+                          new=Mock(side_effect=[sentinel.source, sentinel.target])):
+            # Should raise NotImplementedError
+            with self.assertRaises(NotImplementedError) as ctx:
+                self.service.sync_datasets(
+                    "source", "target", "main", "main",
+                    direction=SyncDirection.BIDIRECTIONAL
+                )
         
         self.assertIn("not yet supported", str(ctx.exception))
         
     def test_delete_dataset_success(self):
         """Test successful dataset deletion."""
         # Mock dataset
-        dataset = DatasetMetadata(
+        dataset = _fast_meta(
             dataset_id="to-delete",
             source_dir="/path",
             dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=5
         )
         
@@ -285,8 +299,7 @@ class TestDatasetService(unittest.TestCase):
         mock_txn_storage.delete_dataset.return_value = True
         
         self.mock_storage.get_dataset_metadata.return_value = dataset
-        self.mock_storage.transaction.return_value.__enter__ = Mock(return_value=mock_txn_storage)
-        self.mock_storage.transaction.return_value.__exit__ = Mock(return_value=None)
+        self._make_txn(mock_txn_storage)
         
         # Delete dataset
         result = self.service.delete_dataset("to-delete")
@@ -299,22 +312,22 @@ class TestDatasetService(unittest.TestCase):
     def test_delete_dataset_with_children_no_force(self):
         """Test deletion fails when dataset has children and force=False."""
         # Mock dataset with children
-        parent = DatasetMetadata(
+        parent = _fast_meta(
             dataset_id="parent",
             source_dir="/path",
             dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=5
         )
         
-        child = DatasetMetadata(
+        child = _fast_meta(
             dataset_id="child",
             source_dir="/path",
             dataset_type="fork",
             parent_dataset_id="parent",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=3
         )
         
@@ -323,8 +336,7 @@ class TestDatasetService(unittest.TestCase):
         mock_txn_storage.list_datasets.return_value = [parent, child]
         
         self.mock_storage.get_dataset_metadata.return_value = parent
-        self.mock_storage.transaction.return_value.__enter__ = Mock(return_value=mock_txn_storage)
-        self.mock_storage.transaction.return_value.__exit__ = Mock(return_value=None)
+        self._make_txn(mock_txn_storage)
         
         # Should raise ValueError
         with self.assertRaises(ValueError) as ctx:
@@ -335,22 +347,22 @@ class TestDatasetService(unittest.TestCase):
     def test_delete_dataset_with_children_force(self):
         """Test force deletion of dataset with children."""
         # Mock dataset with children
-        parent = DatasetMetadata(
+        parent = _fast_meta(
             dataset_id="parent",
             source_dir="/path",
             dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=5
         )
         
-        child = DatasetMetadata(
+        child = _fast_meta(
             dataset_id="child",
             source_dir="/path",
             dataset_type="fork",
             parent_dataset_id="parent",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=3
         )
         
@@ -361,8 +373,7 @@ class TestDatasetService(unittest.TestCase):
         mock_txn_storage.delete_dataset.return_value = True
         
         self.mock_storage.get_dataset_metadata.return_value = parent
-        self.mock_storage.transaction.return_value.__enter__ = Mock(return_value=mock_txn_storage)
-        self.mock_storage.transaction.return_value.__exit__ = Mock(return_value=None)
+        self._make_txn(mock_txn_storage)
         
         # Delete with force=True should succeed
         result = self.service.delete_dataset("parent", force=True)
@@ -372,79 +383,47 @@ class TestDatasetService(unittest.TestCase):
         mock_txn_storage.delete_all_documentation.assert_called_once_with("parent")
         mock_txn_storage.delete_dataset.assert_called_once_with("parent")
             
-    def test_fork_dataset_transaction_rollback(self):
-        """Test transaction rollback when forking fails."""
-        # Mock source dataset
-        source_metadata = DatasetMetadata(
-            dataset_id="source-dataset",
-            source_dir="/source/path",
-            dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
-            files_count=5
-        )
-        
-        # Mock transaction context
-        mock_txn_storage = Mock(spec=StorageBackend)
-        mock_txn_storage.get_dataset_metadata.return_value = None  # Dataset doesn't exist
-        mock_txn_storage.create_dataset.side_effect = RuntimeError("Database error")
-        
-        # Set up mocks
-        self.mock_storage.get_dataset_metadata.return_value = source_metadata
-        self.mock_storage.transaction.return_value.__enter__ = Mock(return_value=mock_txn_storage)
-        self.mock_storage.transaction.return_value.__exit__ = Mock(return_value=None)
-        
-        # Fork should raise exception
-        with self.assertRaises(RuntimeError) as ctx:
-            self.service.fork_dataset("source-dataset", "forked-dataset")
-        
-        self.assertIn("Database error", str(ctx.exception))
-        
-        # Verify transaction was rolled back (exit was called with exception)
-        exit_call_args = self.mock_storage.transaction.return_value.__exit__.call_args
-        self.assertIsNotNone(exit_call_args[0][0])  # exc_type should not be None
-            
-    def test_delete_dataset_transaction_rollback(self):
-        """Test transaction rollback when deletion fails."""
-        # Mock dataset
-        dataset = DatasetMetadata(
-            dataset_id="to-delete",
-            source_dir="/path",
-            dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
-            files_count=5
-        )
-        
-        # Mock transaction
-        mock_txn_storage = Mock(spec=StorageBackend)
-        mock_txn_storage.list_datasets.return_value = []  # No children
-        mock_txn_storage.delete_all_documentation.return_value = 5
-        mock_txn_storage.delete_dataset.side_effect = RuntimeError("Delete failed")
-        
-        self.mock_storage.get_dataset_metadata.return_value = dataset
-        self.mock_storage.transaction.return_value.__enter__ = Mock(return_value=mock_txn_storage)
-        self.mock_storage.transaction.return_value.__exit__ = Mock(return_value=None)
-        
-        # Delete should raise exception
-        with self.assertRaises(RuntimeError) as ctx:
-            self.service.delete_dataset("to-delete")
-        
-        self.assertIn("Delete failed", str(ctx.exception))
+    def test_transaction_rollback(self):
+        """Test transaction rollback when forking or deleting fails."""
+        cases = [
+            ("fork", lambda service: service.fork_dataset("source-dataset", "forked-dataset"),
+             "create_dataset"),
+            ("delete", lambda service: service.delete_dataset("to-delete"),
+             "delete_dataset"),
+        ]
         
-        # Verify transaction was rolled back
-        exit_call_args = self.mock_storage.transaction.return_value.__exit__.call_args
-        self.assertIsNotNone(exit_call_args[0][0])  # exc_type should not be None
+        for name, action, failing_method in cases:
+            with self.subTest(name):
+                # Mock transaction
+                mock_txn_storage = Mock(spec=StorageBackend)
+                mock_txn_storage.get_dataset_metadata.return_value = None  # Fork target doesn't exist
+                mock_txn_storage.list_datasets.return_value = []  # No children
+                mock_txn_storage.delete_all_documentation.return_value = 5
+                getattr(mock_txn_storage, failing_method).side_effect = RuntimeError(f"{name} failed")
+                
+                txn = self._make_txn(mock_txn_storage)
+                
+                # The looked-up dataset only needs to exist and expose its source directory
+                with patch.object(self.service, 'get_dataset',
+                                  new=Mock(return_value=Mock(source_dir="/source/path"))):
+                    with self.assertRaises(RuntimeError) as ctx:
+                        action(self.service)
+                
+                self.assertIn(f"{name} failed", str(ctx.exception))
+                
+                # Verify transaction was rolled back (exit was called with exception)
+                exit_call_args = txn.__exit__.call_args
+                self.assertIsNotNone(exit_call_args[0][0])  # exc_type should not be None
             
     def test_get_dataset_stats(self):
         """Test getting dataset statistics."""
         # Mock dataset
-        dataset = DatasetMetadata(
+        dataset = _fast_meta(
             dataset_id="test-dataset",
             source_dir="/path",
             dataset_type="main",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=10
         )
         
@@ -453,7 +432,7 @@ class TestDatasetService(unittest.TestCase):
             dataset_id="test-dataset",
             total_files=10,
             total_size_bytes=1024000,
-            last_updated=datetime.now(),
+            last_updated=_FIXED_TS,
             file_types={'.py': 5, '.md': 3, '.txt': 2},
             largest_files=[('large.py', 10000), ('README.md', 5000)]
         )
@@ -478,40 +457,12 @@ class TestDatasetService(unittest.TestCase):
             ['file2.py', 'file3.py', 'file4.py']   # dataset2
         ]
         
-        # Mock file documentation for common files
-        doc1_file2 = FileDocumentation(
-            filepath='file2.py',
-            filename='file2.py',
-            overview='File 2 overview',
-            dataset='dataset1',
-            content_hash='hash1',
-            documented_at=datetime.now()
-        )
-        doc2_file2 = FileDocumentation(
-            filepath='file2.py',
-            filename='file2.py',
-            overview='File 2 overview',
-            dataset='dataset2',
-            content_hash='hash1',  # Same hash
-            documented_at=datetime.now()
-        )
+        # Mock file documentation for common files (only content_hash is compared)
+        doc1_file2 = _Doc('file2.py', 'hash1')
+        doc2_file2 = _Doc('file2.py', 'hash1')  # Same hash
         
-        doc1_file3 = FileDocumentation(
-            filepath='file3.py',
-            filename='file3.py',
-            overview='File 3 overview',
-            dataset='dataset1',
-            content_hash='hash3a',
-            documented_at=datetime.now()
-        )
-        doc2_file3 = FileDocumentation(
-            filepath='file3.py',
-            filename='file3.py',
-            overview='File 3 overview',
-            dataset='dataset2',
-            content_hash='hash3b',  # Different hash
-            documented_at=datetime.now()
-        )
+        doc1_file3 = _Doc('file3.py', 'hash3a')
+        doc2_file3 = _Doc('file3.py', 'hash3b')  # Different hash
         
         # Mock batch documentation retrieval
         self.mock_storage.get_file_documentation_batch.side_effect = [
@@ -531,48 +482,49 @@ class TestDatasetService(unittest.TestCase):
     def test_cleanup_orphaned_datasets_dry_run(self):
         """Test finding orphaned datasets without deleting."""
         # Mock worktree datasets
-        wt1 = DatasetMetadata(
+        wt1 = _fast_meta(
             dataset_id="main__wt_feature1",
             source_dir="/worktree1",
             dataset_type="worktree",
             source_branch="feature1",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=5
         )
-        wt2 = DatasetMetadata(
+        wt2 = _fast_meta(
             dataset_id="main__wt_feature2",
             source_dir="/worktree2",
             dataset_type="worktree",
             source_branch="feature2",
-            loaded_at=datetime.now(),
-            updated_at=datetime.now(),
+            loaded_at=_FIXED_TS,
+            updated_at=_FIXED_TS,
             files_count=3
         )
         
         self.mock_storage.list_datasets.return_value = [wt1, wt2]
         
+        worktree_datasets = [
+            Dataset(
+                dataset_id="main__wt_feature1",
+                source_dir="/worktree1",
+                dataset_type=DatasetType.WORKTREE,
+                created_at=_FIXED_TS,
+                updated_at=_FIXED_TS,
+                source_branch="feature1"
+            ),
+            Dataset(
+                dataset_id="main__wt_feature2",
+                source_dir="/worktree2",
+                dataset_type=DatasetType.WORKTREE,
+                created_at=_FIXED_TS,
+                updated_at=_FIXED_TS,
+                source_branch="feature2"
+            )
+        ]
+        
         # Mock worktree existence check
-        with patch.object(self.service, 'list_datasets') as mock_list:
-            mock_list.return_value = [
-                Dataset(
-                    dataset_id="main__wt_feature1",
-                    source_dir="/worktree1",
-                    dataset_type=DatasetType.WORKTREE,
-                    created_at=datetime.now(),
-                    updated_at=datetime.now(),
-                    source_branch="feature1"
-                ),
-                Dataset(
-                    dataset_id="main__wt_feature2",
-                    source_dir="/worktree2",
-                    dataset_type=DatasetType.WORKTREE,
-                    created_at=datetime.now(),
-                    updated_at=datetime.now(),
-                    source_branch="feature2"
-                )
-            ]
-            
+        with patch.object(self.service, 'list_datasets',
+                          new=Mock(return_value=worktree_datasets)):
             # Mock that first worktree still exists, second doesn't
             self.service.worktree_handler.worktree_exists = Mock(side_effect=[True, False])
             
@@ -662,7 +614,7 @@ class TestWorktreeHandler(unittest.TestCase):
         self.mock_git.run_command.return_value = "/path/to/.git/worktrees/feature"
         
         # Mock .git file exists
-        with patch('pathlib.Path.is_file', return_value=True):
+        with patch('pathlib.Path.is_file', new=Mock(return_value=True)):
             result = self.handler.is_worktree("/path/to/worktree")
             
         self.assertTrue(result)
@@ -674,7 +626,7 @@ class TestWorktreeHandler(unittest.TestCase):
         self.mock_git.run_command.return_value = "/path/to/repo/.git"
         
         # Mock .git is directory
-        with patch('pathlib.Path.is_file', return_value=False):
+        with patch('pathlib.Path.is_file', new=Mock(return_value=False)):
             result = self.handler.is_worktree("/path/to/repo")
             
         self.assertFalse(result)
@@ -79,13 +79,14 @@ class TestProgressiveSearchStrategy(unittest.TestCase):
     def test_all_strategies_tried(self):
         """Test that all strategies are tried if needed."""
         # Mock search function
-        call_count = {"count": 0}
+        call_count = 0
         queries_tried = []
         
         def search_func(query):
-            call_count["count"] += 1
+            nonlocal call_count
+            call_count += 1
             queries_tried.append(query)
-            return [f"result{call_count['count']}"]  # One result per strategy
+            return [f"result{call_count}"]  # One result per strategy
         
         results = self.progressive.execute_search(
             "test",
@@ -94,7 +95,7 @@ class TestProgressiveSearchStrategy(unittest.TestCase):
         )
         
         # All three strategies should be tried
-        self.assertEqual(call_count["count"], 3)
+        self.assertEqual(call_count, 3)
         self.assertEqual(len(queries_tried), 3)
         self.assertEqual(queries_tried, ['"test"', 'test', 'test*'])
         self.assertEqual(results, ["result1", "result2", "result3"])
@@ -122,6 +123,40 @@ class TestProgressiveSearchStrategy(unittest.TestCase):
         ids = [r["id"] for r in results]
         self.assertEqual(ids, [1, 2, 3])
     
+    def test_deduplication_stops_at_max_results(self):
+        """Test that results past max_results are not keyed for deduplication."""
+        def search_func(query):
+            return list(range(100))
+        
+        dedup_key = Mock(side_effect=lambda r: r)
+        results = self.progressive.execute_search(
+            "test",
+            search_func,
+            max_results=10,
+            deduplicate_func=dedup_key
+        )
+        
+        self.assertEqual(results, list(range(10)))
+        self.assertEqual(dedup_key.call_count, 10)
+    
+    def test_generator_search_func_consumed_lazily(self):
+        """Test that a generator search function is only drained to max_results."""
+        pulled = []
+        
+        def search_func(query):
+            for i in range(100):
+                pulled.append(i)
+                yield i
+        
+        results = self.progressive.execute_search(
+            "test",
+            search_func,
+            max_results=10
+        )
+        
+        self.assertEqual(results, list(range(10)))
+        self.assertEqual(len(pulled), 10)
+    
     def test_max_results_limit(self):
         """Test that max_results is respected."""
         # Mock search function that returns many results
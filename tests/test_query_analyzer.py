@@ -9,9 +9,11 @@ from search.query_analyzer import (
 class TestQueryComplexityAnalyzer(unittest.TestCase):
     """Test the query complexity analyzer."""
     
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         """Set up test fixtures."""
-        self.analyzer = QueryComplexityAnalyzer()
+        # The analyzer holds only thresholds, so one instance serves every test
+        cls.analyzer = QueryComplexityAnalyzer()
     
     def test_empty_query(self):
         """Test analysis of empty query."""
@@ -38,16 +40,6 @@ class TestQueryComplexityAnalyzer(unittest.TestCase):
         self.assertEqual(metrics.term_count, 3)
         self.assertEqual(metrics.complexity_level, ComplexityLevel.SIMPLE)
     
-    def test_operator_counting(self):
-        """Test counting of boolean operators."""
-        metrics = self.analyzer.analyze("test AND python OR javascript NOT typescript")
-        self.assertEqual(metrics.operator_count, 3)
-        self.assertEqual(metrics.term_count, 4)
-        
-        # Case insensitive
-        metrics = self.analyzer.analyze("test and python or javascript")
-        self.assertEqual(metrics.operator_count, 2)
-    
     def test_nesting_depth(self):
         """Test calculation of nesting depth."""
         # No nesting
@@ -66,55 +58,48 @@ class TestQueryComplexityAnalyzer(unittest.TestCase):
         metrics = self.analyzer.analyze("(((((deep)))))")
         self.assertEqual(metrics.nesting_depth, 5)
     
-    def test_wildcard_counting(self):
-        """Test counting of wildcard operators."""
-        # Simple wildcards
-        metrics = self.analyzer.analyze("test* python*")
-        self.assertEqual(metrics.wildcard_count, 2)
-        
-        # Wildcards in quotes should not count
-        metrics = self.analyzer.analyze('test* "not a wildcard*" real*')
-        self.assertEqual(metrics.wildcard_count, 2)
-        
-        # Test escaped quotes don't affect wildcard counting
-        metrics = self.analyzer.analyze('a* "phrase with \\" quote" b*')
-        self.assertEqual(metrics.wildcard_count, 2)
-        
-        # Complex escaping scenario
-        metrics = self.analyzer.analyze('test* "quoted \\"nested\\" text*" real*')
-        self.assertEqual(metrics.wildcard_count, 2)
-        
-        # Edge case: escaped quote at end of phrase with wildcard
-        metrics = self.analyzer.analyze('start* "phrase with escaped quote \\" and a wildcard*" end*')
-        self.assertEqual(metrics.wildcard_count, 2)
-        
-        # Multiple escaped quotes in one phrase
-        metrics = self.analyzer.analyze('a* "this \\" has \\" multiple \\" quotes*" b*')
-        self.assertEqual(metrics.wildcard_count, 2)
-        
-        # Escaped backslash before quote
-        metrics = self.analyzer.analyze('test* "escaped backslash \\\\ before quote*" real*')
-        self.assertEqual(metrics.wildcard_count, 2)
-    
-    def test_phrase_counting(self):
-        """Test counting of quoted phrases."""
-        # Single phrase
-        metrics = self.analyzer.analyze('"hello world"')
-        self.assertEqual(metrics.phrase_count, 1)
-        
-        # Multiple phrases
-        metrics = self.analyzer.analyze('"hello world" AND "python programming"')
-        self.assertEqual(metrics.phrase_count, 2)
-        
-        # Escaped quotes
-        metrics = self.analyzer.analyze(r'"hello \"nested\" world"')
-        self.assertEqual(metrics.phrase_count, 1)
-    
-    def test_special_char_counting(self):
-        """Test counting of code-specific special characters."""
-        # Programming symbols
-        metrics = self.analyzer.analyze("$variable @decorator Class::method file-name.py")
-        self.assertGreater(metrics.special_char_count, 0)
+    def test_component_counting(self):
+        """Test counting of operators, wildcards, phrases and special characters."""
+        cases = [
+            # Boolean operators
+            ("test AND python OR javascript NOT typescript", 'operator_count', 3),
+            ("test AND python OR javascript NOT typescript", 'term_count', 4),
+            # Case insensitive
+            ("test and python or javascript", 'operator_count', 2),
+            # Operator letters inside words are not operators
+            ("HANDLE error notify", 'operator_count', 0),
+            ("HANDLE error notify", 'term_count', 3),
+            
+            # Simple wildcards
+            ("test* python*", 'wildcard_count', 2),
+            # Wildcards in quotes should not count
+            ('test* "not a wildcard*" real*', 'wildcard_count', 2),
+            # Test escaped quotes don't affect wildcard counting
+            ('a* "phrase with \\" quote" b*', 'wildcard_count', 2),
+            # Complex escaping scenario
+            ('test* "quoted \\"nested\\" text*" real*', 'wildcard_count', 2),
+            # Edge case: escaped quote at end of phrase with wildcard
+            ('start* "phrase with escaped quote \\" and a wildcard*" end*', 'wildcard_count', 2),
+            # Multiple escaped quotes in one phrase
+            ('a* "this \\" has \\" multiple \\" quotes*" b*', 'wildcard_count', 2),
+            # Escaped backslash before quote
+            ('test* "escaped backslash \\\\ before quote*" real*', 'wildcard_count', 2),
+            
+            # Single phrase
+            ('"hello world"', 'phrase_count', 1),
+            # Multiple phrases
+            ('"hello world" AND "python programming"', 'phrase_count', 2),
+            # Escaped quotes
+            (r'"hello \"nested\" world"', 'phrase_count', 1),
+            
+            # Programming symbols: $ @ : : - .
+            ("$variable @decorator Class::method file-name.py", 'special_char_count', 6),
+        ]
+        
+        for query, field, expected in cases:
+            with self.subTest(query=query, field=field):
+                metrics = self.analyzer.analyze(query)
+                self.assertEqual(getattr(metrics, field), expected)
     
     def test_cost_calculation(self):
         """Test query cost calculation."""
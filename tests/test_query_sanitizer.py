@@ -1,6 +1,8 @@
 """Tests for FTS5 query sanitizer."""
 
+import sqlite3
 import unittest
+from unittest.mock import patch
 from search.query_sanitizer import FTS5QuerySanitizer, SanitizationConfig
 
 
@@ -130,15 +132,14 @@ class TestFTS5QuerySanitizer(unittest.TestCase):
         )
         
         # NEAR with terms containing quotes
-        # When quotes form valid phrases, they're extracted first
+        # The NEAR clause is matched as a whole, so quotes inside it stay
+        # part of its terms and are escaped there
         result = self.sanitizer.sanitize('NEAR(foo"bar test"case, 5)')
-        # The quoted part "bar test" is extracted as a phrase first
-        self.assertEqual(result, 'NEAR("foo__PHRASE_0__case", 5)')
+        self.assertEqual(result, 'NEAR("foo""bar" "test""case", 5)')
         
-        # Another case with quotes forming phrases
+        # Another case with quotes inside NEAR terms
         result = self.sanitizer.sanitize('NEAR(get"value set"value, 3)')
-        # "value set" is extracted as a phrase
-        self.assertEqual(result, 'NEAR("get__PHRASE_0__value", 3)')
+        self.assertEqual(result, 'NEAR("get""value" "set""value", 3)')
         
         # Direct test of the internal method to verify our fix
         # This tests that when terms with quotes are passed to _sanitize_near_terms,
@@ -150,8 +151,7 @@ class TestFTS5QuerySanitizer(unittest.TestCase):
         sanitized_terms = sanitizer._sanitize_near_terms('user"s data"s')
         self.assertEqual(sanitized_terms, '"user""s" "data""s"')
         
-        # Test 2: Terms that look like they have quotes but are actually clean
-        # after the phrase extraction phase
+        # Test 2: Terms without quotes are only wrapped
         sanitized_terms = sanitizer._sanitize_near_terms('foo__PHRASE_0__bar test__PHRASE_1__case')
         self.assertEqual(sanitized_terms, '"foo__PHRASE_0__bar" "test__PHRASE_1__case"')
     
@@ -325,6 +325,99 @@ class TestFTS5QuerySanitizer(unittest.TestCase):
             'search for "the ""best"" solution"'
         )
 
+    
+    def test_phrases_adjacent_to_other_syntax(self):
+        """Test that phrases touching other tokens come out intact."""
+        cases = [
+            # Phrase glued to a term
+            ('x "a b"c', 'x "a b" c'),
+            ('foo"bar baz"', 'foo "bar baz"'),
+            # Initial token match on a phrase
+            ('a "b" ^"c d" e', 'a "b" ^"c d" e'),
+            # Text glued to a phrase is never an operator
+            ('"a b"OR c', '"a b" "OR" c'),
+            # Phrases inside NEAR stay intact
+            ('NEAR("p q" r)', 'NEAR("p q" "r", 10)'),
+            # Placeholder-like user text is an ordinary term
+            ('__PHRASE_0__ "x"', '"__PHRASE_0__" "x"'),
+            # An unbalanced quote stays part of its term
+            ('"unclosed phrase', '"""unclosed" phrase'),
+        ]
+        for query, expected in cases:
+            with self.subTest(query=query):
+                self.assertEqual(self.sanitizer.sanitize(query), expected)
+        
+        # Column filter followed directly by a phrase
+        self.assertEqual(
+            self.permissive_sanitizer.sanitize('title:"foo bar"'),
+            'title: "foo bar"'
+        )
+    
+    def test_stray_quotes_and_fts5_validity(self):
+        """Test that stray quotes and bare syntax give queries FTS5 accepts."""
+        db = sqlite3.connect(':memory:')
+        self.addCleanup(db.close)
+        db.execute(
+            "CREATE VIRTUAL TABLE docs USING fts5(body, "
+            "tokenize = 'unicode61 tokenchars ''._$@->:#''')"
+        )
+        db.execute("INSERT INTO docs VALUES ('foo bar error and p q r')")
+
+        cases = [
+            # A stray quote keeps its term whole, so no operator leaks out
+            ('foo"OR bar', '"foo""OR" bar'),
+            ('x"NOT y', '"x""NOT" y'),
+            ('error"AND', '"error""AND"'),
+            ('^foo"bar', '^"foo""bar"'),
+            # Phrases inside NEAR stay intact
+            ('NEAR("p q" r)', 'NEAR("p q" "r", 10)'),
+            ('NEAR("p q")', 'NEAR("p q", 10)'),
+            # Nothing searchable left
+            ('*', '""'),
+            ('NEAR(*)', '""'),
+            # Unbalanced parentheses are closed or dropped
+            ('(foo OR bar', '( foo OR bar )'),
+            ('foo) bar', 'foo bar'),
+            # * and ^ only follow a plain word or a phrase
+            ('$user*', '"$user"*'),
+            ('^a.b', '^"a.b"'),
+            ('a,b', '"a,b"'),
+        ]
+        for query, expected in cases:
+            with self.subTest(query=query):
+                sanitized = self.sanitizer.sanitize(query)
+                self.assertEqual(sanitized, expected)
+                # Raises OperationalError on an FTS5 syntax error
+                db.execute("SELECT rowid FROM docs WHERE docs MATCH ?", (sanitized,)).fetchall()
+
+    def test_results_are_cached(self):
+        """Test that repeated queries are served from the cache."""
+        with patch.object(
+            self.sanitizer, '_extract_query_components',
+            wraps=self.sanitizer._extract_query_components
+        ) as extract:
+            first = self.sanitizer.sanitize("user_id AND login")
+            second = self.sanitizer.sanitize("user_id AND login")
+            self.assertEqual(first, second)
+            self.assertEqual(extract.call_count, 1)
+            
+            # A per-call config is part of the cache key
+            self.sanitizer.sanitize(
+                "user_id AND login", config=SanitizationConfig(max_wildcards=1)
+            )
+            self.assertEqual(extract.call_count, 2)
+            
+            # Replacing the instance config drops stale results
+            self.sanitizer.config = SanitizationConfig(allow_column_filters=True)
+            self.sanitizer.sanitize("user_id AND login")
+            self.assertEqual(extract.call_count, 3)
+    
+    def test_errors_are_not_cached(self):
+        """Test that rejected queries are re-checked on every call."""
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.sanitizer.sanitize("a* b* c* d* e* f*")
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
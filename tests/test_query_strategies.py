@@ -1,6 +1,9 @@
 """Tests for query building strategies."""
 
 import unittest
+from unittest.mock import patch
+
+from search import query_strategies
 from search.query_strategies import (
     DefaultQueryStrategy,
     CodeAwareQueryStrategy,
@@ -41,6 +44,46 @@ class TestQueryStrategies(unittest.TestCase):
         # Preserve quoted phrases
         self.assertEqual(strategy.build('"exact match"'), '"exact match"')
     
+    def test_code_aware_single_word_fast_path(self):
+        """Test single bare words skip term extraction but build the same query."""
+        strategy = CodeAwareQueryStrategy()
+        
+        cases = [
+            ("login", "login"),
+            ("  getUserById  ", "getUserById"),
+            ("abc123", "abc123"),
+            ("OR", "OR"),
+            ("café", "café"),
+        ]
+        with patch.object(query_strategies, 'extract_terms', wraps=query_strategies.extract_terms) as extract:
+            for query, expected in cases:
+                with self.subTest(query=query):
+                    self.assertEqual(strategy.build(query), expected)
+            extract.assert_not_called()
+            
+            # Anything beyond one alphanumeric word takes the full path
+            self.assertEqual(strategy.build("my_func"), '"my_func"')
+            extract.assert_called_once()
+    
+    def test_code_aware_or_chain_deduplication(self):
+        """Test repeated operands of a flat OR chain are dropped."""
+        strategy = CodeAwareQueryStrategy()
+        
+        cases = [
+            ("login OR login", "login"),
+            ("my_func OR my_func OR user", '"my_func" OR user'),
+            ("auth* OR user OR auth*", "auth* OR user"),
+            ("NEAR(a b) OR NEAR(a b)", "NEAR(a b)"),
+            # Unchanged: no repeats, lowercase or, mixed operators, groups
+            ("login OR signup", "login OR signup"),
+            ("login or login", "login or login"),
+            ("user OR auth AND user", "user OR auth AND user"),
+            ("(login OR login)", "(login OR login)"),
+        ]
+        for query, expected in cases:
+            with self.subTest(query=query):
+                self.assertEqual(strategy.build(query), expected)
+    
     def test_code_aware_advanced_queries(self):
         """Test advanced query handling in code-aware strategy."""
         strategy = CodeAwareQueryStrategy()
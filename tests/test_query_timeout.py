@@ -6,6 +6,8 @@ import tempfile
 import os
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from unittest.mock import Mock, patch, MagicMock
 
 from storage.sqlite_backend import SqliteBackend
@@ -13,43 +15,69 @@ from storage.models import FileDocumentation
 from search.search_service import SearchService, SearchConfig
 
 
+# Fixture fields identical for every document, shared rather than rebuilt per row
+_SHARED_DOC_FIELDS = {
+    "functions": {"test_func": "Test function"},
+    "exports": ["export1", "export2"],
+    "imports": ["import1", "import2"],
+    "types_interfaces_classes": ["TestClass"],
+    "constants": {"CONST1": "value1"},
+    "dependencies": ["dep1", "dep2"],
+    "other_notes": "Test notes",
+    "documented_at_commit": "abc123",
+}
+_CONTENT_TEMPLATE = "Content for file {i} " * 100
+
+
 class TestQueryTimeout(unittest.TestCase):
     """Test query timeout handling in SqliteBackend."""
     
-    def setUp(self):
-        """Set up test fixtures."""
-        # Create temporary database
-        self.temp_db_fd, self.temp_db_path = tempfile.mkstemp()
-        self.backend = SqliteBackend(self.temp_db_path)
+    @classmethod
+    def setUpClass(cls):
+        """Build the populated database once; each test gets its own copy."""
+        cls._template_dir = tempfile.TemporaryDirectory()
+        cls._template_path = os.path.join(cls._template_dir.name, 'template.db')
+        backend = SqliteBackend(cls._template_path)
         
         # Create test dataset
-        self.backend.create_dataset("test_dataset", "/test/path")
+        backend.create_dataset("test_dataset", "/test/path")
         
-        # Insert test data
-        for i in range(100):
-            doc = FileDocumentation(
+        # Insert test data with a single FTS5 index build
+        docs = [
+            FileDocumentation(
                 dataset="test_dataset",
                 filepath=f"/test/file{i}.py",
                 filename=f"file{i}.py",
                 overview=f"Test file {i} with lots of content to search through",
                 ddd_context=f"Domain context for file {i}",
-                functions={"test_func": "Test function"},
-                exports=["export1", "export2"],
-                imports=["import1", "import2"],
-                types_interfaces_classes=["TestClass"],
-                constants={"CONST1": "value1"},
-                dependencies=["dep1", "dep2"],
-                other_notes="Test notes",
-                full_content=f"Content for file {i} " * 100,  # Long content
-                documented_at_commit="abc123"
+                full_content=_CONTENT_TEMPLATE.format(i=i),  # Long content
+                **_SHARED_DOC_FIELDS
             )
-            self.backend.insert_documentation(doc)
+            for i in range(100)
+        ]
+        backend.bulk_load(docs)
+        backend.close()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the template database."""
+        cls._template_dir.cleanup()
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        # Copy the template into a private in-memory database. The URI name is
+        # unique per test, and the extra connection keeps the database alive
+        # until tearDown even when the pool has no open connections.
+        self.db_uri = f"file:query_timeout_{id(self)}?mode=memory&cache=shared"
+        self._keepalive = sqlite3.connect(self.db_uri, uri=True)
+        with closing(sqlite3.connect(self._template_path)) as src:
+            src.backup(self._keepalive)
+        self.backend = SqliteBackend(self.db_uri, uri=True)
     
     def tearDown(self):
         """Clean up test fixtures."""
         self.backend.close()
-        os.close(self.temp_db_fd)
-        os.unlink(self.temp_db_path)
+        self._keepalive.close()
     
     def test_timeout_context_manager_no_timeout(self):
         """Test that queries work normally without timeout."""
@@ -76,13 +104,26 @@ class TestQueryTimeout(unittest.TestCase):
             
             self.assertIn("Query exceeded timeout", str(cm.exception))
     
+    def test_timeout_interrupts_running_statement(self):
+        """Test that a statement still running at the deadline is aborted."""
+        endless = """
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n)
+            SELECT COUNT(*) FROM n
+        """
+        with self.backend.connection_pool.get_connection() as conn:
+            threads_before = threading.active_count()
+            started = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                with self.backend._query_timeout(conn, 50):
+                    self.assertEqual(threading.active_count(), threads_before)
+                    conn.execute(endless).fetchone()
+            self.assertLess(time.monotonic() - started, 5)
+            
+            # The handler is removed, so the pooled connection is reusable
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM files").fetchone()[0], 100)
+    
     def test_search_files_with_timeout(self):
         """Test search_files respects timeout parameter."""
-        # FTS5 requires manual insert for external content tables
-        # Insert into FTS5 first
-        with self.backend.connection_pool.get_connection() as conn:
-            conn.execute("INSERT INTO files_fts(files_fts) VALUES('rebuild')")
-        
         # Test normal operation
         results = self.backend.search_files(
             query="test",
@@ -106,11 +147,6 @@ class TestQueryTimeout(unittest.TestCase):
     
     def test_search_full_content_with_timeout(self):
         """Test search_full_content respects timeout parameter."""
-        # FTS5 requires manual insert for external content tables
-        # Insert into FTS5 first
-        with self.backend.connection_pool.get_connection() as conn:
-            conn.execute("INSERT INTO files_fts(files_fts) VALUES('rebuild')")
-        
         # Test normal operation
         results = self.backend.search_full_content(
             query="content",
@@ -164,7 +200,11 @@ class TestQueryTimeout(unittest.TestCase):
             self.assertEqual(call_kwargs.get('timeout_ms'), 1000)
     
     def test_timeout_cleanup(self):
-        """Test that timeout timer is properly cleaned up."""
+        """Test that the timeout's progress handler is removed after the block."""
+        counted = """
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000)
+            SELECT COUNT(*) FROM n
+        """
         with self.backend.connection_pool.get_connection() as conn:
             # Track active threads before
             threads_before = threading.active_count()
@@ -174,44 +214,34 @@ class TestQueryTimeout(unittest.TestCase):
                 cursor = conn.execute("SELECT 1")
                 cursor.fetchone()
             
-            # Give timer thread time to clean up
-            time.sleep(0.1)
+            # No thread is started for the timeout
+            self.assertEqual(threading.active_count(), threads_before)
             
-            # Verify no lingering threads
-            threads_after = threading.active_count()
-            self.assertEqual(threads_before, threads_after, "Timer thread not cleaned up")
+            # Move the clock past the deadline; a handler left installed
+            # would now interrupt this long-running statement
+            with patch('storage.sqlite_backend.time.monotonic', return_value=time.monotonic() + 3600):
+                self.assertEqual(conn.execute(counted).fetchone()[0], 100000)
     
     def test_concurrent_timeouts(self):
         """Test multiple concurrent queries with timeouts."""
-        results = []
-        errors = []
-        
         def run_query(timeout_ms):
             try:
-                result = self.backend.search_files(
+                return len(self.backend.search_files(
                     query="test",
                     dataset_id="test_dataset",
                     limit=5,
                     timeout_ms=timeout_ms
-                )
-                results.append(len(result))
-            except TimeoutError as e:
-                errors.append(str(e))
-        
-        # Run multiple queries concurrently
-        threads = []
-        for i in range(5):
-            # Mix of different timeouts
-            timeout = 5000 if i % 2 == 0 else 100
-            t = threading.Thread(target=run_query, args=(timeout,))
-            threads.append(t)
-            t.start()
+                ))
+            except TimeoutError:
+                return None
         
-        # Wait for all threads
-        for t in threads:
-            t.join()
+        # Run multiple queries concurrently, with a mix of different timeouts
+        timeouts = [5000 if i % 2 == 0 else 100 for i in range(5)]
+        with ThreadPoolExecutor(max_workers=len(timeouts)) as executor:
+            outcomes = list(executor.map(run_query, timeouts))
         
         # Should have some successful results
+        results = [count for count in outcomes if count is not None]
         self.assertGreater(len(results), 0)
 
 
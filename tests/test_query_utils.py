@@ -42,6 +42,11 @@ class TestQueryUtils(unittest.TestCase):
         # Empty query
         self.assertEqual(extract_terms(""), [])
         self.assertEqual(extract_terms("   "), [])
+        
+        # Results are cached, but callers may mutate their copy
+        terms = extract_terms("one two")
+        terms.append("three")
+        self.assertEqual(extract_terms("one two"), ["one", "two"])
     
     def test_detect_operators(self):
         """Test FTS5 operator detection."""
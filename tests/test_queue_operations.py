@@ -7,7 +7,9 @@ from unittest.mock import patch
 from datetime import datetime
 
 import sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from helpers.queue_manager import QueueManager
 
@@ -16,16 +18,15 @@ class TestQueueOperations(unittest.TestCase):
     
     def setUp(self):
         """Set up test environment."""
-        self.temp_dir = tempfile.mkdtemp()
+        # Registered before anything else can fail, so the directory is
+        # removed even when the rest of setUp raises (tearDown would not run)
+        tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.addCleanup(tmp.cleanup)
+        self.temp_dir = tmp.name
         self.project_root = self.temp_dir
         os.makedirs(os.path.join(self.temp_dir, '.code-query'), exist_ok=True)
         self.queue_manager = QueueManager(self.project_root)
     
-    def tearDown(self):
-        """Clean up test environment."""
-        import shutil
-        shutil.rmtree(self.temp_dir)
-    
     def test_add_files(self):
         """Test adding files to queue with comprehensive validation of all files."""
         files = [
@@ -176,6 +176,59 @@ class TestSqliteBackend(unittest.TestCase):
         # Verify all inserted
         files = self.backend.get_dataset_files("test-dataset")
         self.assertEqual(len(files), 10)
+
+    def test_bulk_load(self):
+        """Test bulk load indexes content once and restores FTS triggers."""
+        self.backend.create_dataset("test-dataset", "/test")
+        self.backend.insert_documentation(FileDocumentation(
+            filepath="/test/existing.py",
+            filename="existing.py",
+            overview="Existing file",
+            dataset="test-dataset",
+            full_content="def obsolete_handler(): pass"
+        ))
+        
+        docs = [
+            FileDocumentation(
+                filepath=f"/test/file{i}.py",
+                filename=f"file{i}.py",
+                overview=f"File {i} overview",
+                dataset="test-dataset",
+                full_content=f"def bulk_handler_{i}(): pass"
+            )
+            for i in range(10)
+        ]
+        # Overwrites the existing row, so its old content must leave the index
+        docs.append(FileDocumentation(
+            filepath="/test/existing.py",
+            filename="existing.py",
+            overview="Existing file",
+            dataset="test-dataset",
+            full_content="def replacement_handler(): pass"
+        ))
+        
+        result = self.backend.bulk_load(docs)
+        
+        self.assertEqual(result.total_items, 11)
+        self.assertEqual(result.successful, 11)
+        self.assertEqual(result.failed, 0)
+        self.assertEqual(self.backend.get_dataset_file_count("test-dataset"), 11)
+        
+        results = self.backend.search_full_content("bulk_handler_3", "test-dataset")
+        self.assertEqual([r.file_path for r in results], ["/test/file3.py"])
+        self.assertEqual(self.backend.search_full_content("obsolete_handler", "test-dataset"), [])
+        self.assertEqual(len(self.backend.search_full_content("replacement_handler", "test-dataset")), 1)
+        
+        # Triggers are back in place, so later single inserts are indexed
+        self.backend.insert_documentation(FileDocumentation(
+            filepath="/test/later.py",
+            filename="later.py",
+            overview="Later file",
+            dataset="test-dataset",
+            full_content="def later_handler(): pass"
+        ))
+        results = self.backend.search_full_content("later_handler", "test-dataset")
+        self.assertEqual([r.file_path for r in results], ["/test/later.py"])
         
     def test_search_metadata(self):
         """Test metadata search functionality."""
@@ -8,7 +8,9 @@ from unittest.mock import Mock, patch, MagicMock
 # Third-party imports should be at the top
 import psutil
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
 from cli.worker_manager import WorkerManager
 